@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for https_server.py
+
+Drives the server with many concurrent HTTP/1.1 keep-alive connections from
+a single asyncio client, replaying a page-load mix (HTML, JS, JSON, PNGs and
+GIFs found in the served directory), and reports requests/s, p50/p95/p99
+latency and bytes/s, overall and per asset type. Each run is appended to
+bench-results/<commit>.json, so every server change can be backed by numbers.
+
+Usage:
+    python3 https_bench.py [--url https://localhost:8443] [--connections 64] [--duration 10]
+                           [--warmup 2] [--root .] [--accept-encoding 'br, gzip'] [--label NAME]
+    python3 https_bench.py --spawn [--port 8550] [--label sendfile] -- --plain-http --workers 64
+"""
+import argparse
+import asyncio
+import datetime
+import glob
+import json
+import os
+import random
+import socket
+import ssl
+import subprocess
+import sys
+import time
+import urllib.parse
+
+DEFAULT_URL = 'https://localhost:8443'
+DEFAULT_CONNECTIONS = 64
+DEFAULT_DURATION = 10
+DEFAULT_WARMUP = 2
+RESULTS_DIR = 'bench-results'
+SPAWN_PORT = 8550
+# Share of requests per asset type, roughly what a dashboard page load fetches
+PAGE_MIX = (
+    ('html', 0.15, ('*.html',)),
+    ('js', 0.35, ('*.js',)),
+    ('json', 0.15, ('*.json',)),
+    ('png', 0.20, ('*.png',)),
+    ('gif', 0.15, ('*.gif',)),
+)
+# Files per asset type; the largest ones, so images really are the heavy requests
+MAX_FILES_PER_TYPE = 8
+READ_TIMEOUT = 30
+# Wait after a failed connect, doubling up to the max while the server stays down
+CONNECT_BACKOFF = 0.05
+CONNECT_BACKOFF_MAX = 1.0
+
+def discover_workload(root):
+    """[(kind, weight, [url paths])] for every PAGE_MIX type present in root"""
+    workload = []
+    for kind, weight, patterns in PAGE_MIX:
+        files = {f for pattern in patterns for f in glob.glob(os.path.join(root, pattern)) if os.path.isfile(f)}
+        files = sorted(files, key=lambda f: (-os.path.getsize(f), f))[:MAX_FILES_PER_TYPE]
+        if files:
+            paths = ['/' + urllib.parse.quote(os.path.basename(f)) for f in files]
+            workload.append((kind, weight, paths))
+    return workload
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.bytes = 0
+        self.statuses = {}
+        self.errors = 0
+        self.connects = 0
+
+    def record(self, kind, latency, status, nbytes):
+        self.latencies.setdefault(kind, []).append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes += nbytes
+
+    def summary(self, elapsed):
+        def describe(values, nbytes=None):
+            values = sorted(values)
+            row = {
+                'requests': len(values),
+                'rps': round(len(values) / elapsed, 1),
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'p99_ms': round(percentile(values, 99) * 1000, 2),
+            }
+            if nbytes is not None:
+                row['bytes_per_s'] = round(nbytes / elapsed)
+            return row
+
+        everything = [v for values in self.latencies.values() for v in values]
+        result = describe(everything, self.bytes)
+        result.update({
+            'seconds': round(elapsed, 2),
+            'errors': self.errors,
+            'connects': self.connects,
+            'statuses': {str(k): v for k, v in sorted(self.statuses.items())},
+            'by_type': {kind: describe(values) for kind, values in sorted(self.latencies.items())},
+        })
+        return result
+
+async def read_response(reader):
+    """Read one response; returns (status, bytes on the wire, server closes the connection)"""
+    nbytes = 0
+    while True:
+        head = await reader.readuntil(b'\r\n\r\n')
+        nbytes += len(head)
+        lines = head.decode('latin-1').split('\r\n')
+        version, status = lines[0].split(' ', 2)[:2]
+        if not 100 <= int(status) < 200:
+            break  # 1xx responses are interim; the real one follows
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    if int(status) in (204, 304):
+        pass  # never has a body, whatever the headers say
+    elif 'content-length' in headers:
+        length = int(headers['content-length'])
+        await reader.readexactly(length)
+        nbytes += length
+    elif headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size_line = await reader.readuntil(b'\r\n')
+            size = int(size_line.split(b';', 1)[0], 16)
+            await reader.readexactly(size + 2)
+            nbytes += len(size_line) + size + 2
+            if size == 0:
+                break
+    else:
+        nbytes += len(await reader.read())
+        return int(status), nbytes, True
+    close = headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0'
+    return int(status), nbytes, close
+
+async def client(host, port, ssl_context, workload, weights, stats, measure_from, stop_at, accept_encoding, seed):
+    """One keep-alive connection issuing requests back to back until stop_at"""
+    rng = random.Random(seed)
+    reader = writer = None
+    loop = asyncio.get_running_loop()
+    backoff = CONNECT_BACKOFF
+    while loop.time() < stop_at:
+        kind, _, paths = rng.choices(workload, weights)[0]
+        path = rng.choice(paths)
+        request = (f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nAccept-Encoding: {accept_encoding}\r\n"
+                   f"User-Agent: https_bench\r\n\r\n").encode('latin-1')
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port, ssl=ssl_context), READ_TIMEOUT)
+                stats.connects += 1
+                backoff = CONNECT_BACKOFF
+            started = loop.time()
+            writer.write(request)
+            status, nbytes, close = await asyncio.wait_for(read_response(reader), READ_TIMEOUT)
+            if started >= measure_from:
+                stats.record(kind, loop.time() - started, status, nbytes)
+        except (OSError, ssl.SSLError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                asyncio.TimeoutError):
+            if loop.time() >= measure_from:
+                stats.errors += 1
+            if writer is None:
+                # Couldn't connect: don't spin while the server is down
+                await asyncio.sleep(min(backoff, max(0, stop_at - loop.time())))
+                backoff = min(backoff * 2, CONNECT_BACKOFF_MAX)
+            close = True
+        if close and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+async def run_benchmark(url, connections, duration, warmup, workload, accept_encoding):
+    parts = urllib.parse.urlsplit(url)
+    ssl_context = None
+    if parts.scheme == 'https':
+        # The local server uses a self-signed certificate
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+    host = parts.hostname or 'localhost'
+    port = parts.port or (443 if ssl_context else 80)
+    weights = [weight for _, weight, _ in workload]
+    stats = Stats()
+    loop = asyncio.get_running_loop()
+    measure_from = loop.time() + warmup
+    stop_at = measure_from + duration
+    await asyncio.gather(*(
+        client(host, port, ssl_context, workload, weights, stats, measure_from, stop_at, accept_encoding, seed)
+        for seed in range(connections)
+    ))
+    return stats.summary(max(loop.time() - measure_from, 1e-9))
+
+def git_commit(cwd):
+    """Short hash of HEAD, with -dirty when the work tree has changes"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=cwd,
+                               capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f"{commit}-dirty" if dirty else commit
+
+def save_result(results_dir, commit, record):
+    """Append record to results_dir/<commit>.json; returns the path"""
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"{commit}.json")
+    runs = []
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            runs = json.load(f)
+    runs.append(record)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(runs, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+def spawn_server(port, server_args):
+    """Start https_server.py on port from the current directory; returns (process, url)"""
+    server = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'https_server.py')
+    proc = subprocess.Popen([sys.executable, server, '--port', str(port), *server_args],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    scheme = 'http' if '--plain-http' in server_args else 'https'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"❌ https_server.py exited with {proc.returncode}")
+        try:
+            with socket.create_connection(('localhost', port), timeout=1):
+                return proc, f"{scheme}://localhost:{port}"
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise SystemExit("❌ https_server.py did not start listening within 30s")
+
+def print_summary(result):
+    print(f"📊 {result['requests']} requests in {result['seconds']}s: {result['rps']} req/s, "
+          f"{result['bytes_per_s'] / (1 << 20):.1f} MB/s")
+    print(f"⏱️  p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms")
+    for kind, row in result['by_type'].items():
+        print(f"   {kind:<5} {row['requests']:>8} req  {row['rps']:>9} req/s  "
+              f"p50 {row['p50_ms']:>8} ms  p95 {row['p95_ms']:>8} ms  p99 {row['p99_ms']:>8} ms")
+    if result['errors'] or set(result['statuses']) - {'200'}:
+        print(f"⚠️  {result['errors']} errors, statuses {result['statuses']}")
+    print(f"🔌 {result['connects']} connections opened")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Keep-alive load benchmark for https_server.py")
+    parser.add_argument('--url', default=DEFAULT_URL, help='server to benchmark (ignored with --spawn)')
+    parser.add_argument('--connections', type=int, default=DEFAULT_CONNECTIONS,
+                        help='concurrent keep-alive connections')
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=DEFAULT_WARMUP,
+                        help='seconds of load before measuring (fills the server caches)')
+    parser.add_argument('--root', default='.', help='served directory the page mix is picked from')
+    parser.add_argument('--accept-encoding', default='br, gzip',
+                        help="Accept-Encoding sent with every request ('identity' to skip compression)")
+    parser.add_argument('--label', default='', help='name for this run in the results file, e.g. sendfile')
+    parser.add_argument('--results-dir', default=RESULTS_DIR, help='where per-commit results are stored')
+    parser.add_argument('--no-save', action='store_true', help='print the results only')
+    parser.add_argument('--spawn', action='store_true',
+                        help='start https_server.py from the current directory for the run; '
+                             'arguments after -- are passed to it')
+    parser.add_argument('--port', type=int, default=SPAWN_PORT, help='port for --spawn')
+    parser.add_argument('server_args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.server_args[:1] == ['--']:
+        args.server_args = args.server_args[1:]
+    return args
+
+def main():
+    args = parse_args()
+    workload = discover_workload(args.root)
+    if not workload:
+        sys.exit(f"❌ No HTML/JS/JSON/PNG/GIF files in {os.path.abspath(args.root)}")
+    proc = None
+    url = args.url
+    if args.spawn:
+        proc, url = spawn_server(args.port, args.server_args)
+    try:
+        print(f"🏁 {url}: {args.connections} connections, {args.warmup:g}s warm-up + {args.duration:g}s, "
+              f"mix {', '.join(f'{kind} {weight:.0%}' for kind, weight, _ in workload)}")
+        result = asyncio.run(run_benchmark(url, args.connections, args.duration, args.warmup, workload,
+                                           args.accept_encoding))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    print_summary(result)
+    if not args.no_save:
+        commit = git_commit(os.path.dirname(os.path.abspath(__file__)))
+        record = {
+            'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'label': args.label,
+            'url': url,
+            'server_args': args.server_args if args.spawn else None,
+            'connections': args.connections,
+            'duration': args.duration,
+            'accept_encoding': args.accept_encoding,
+            'mix': {kind: paths for kind, _, paths in workload},
+            'result': result,
+        }
+        print(f"💾 Saved to {save_result(args.results_dir, commit, record)}")
+    return 0 if result['requests'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
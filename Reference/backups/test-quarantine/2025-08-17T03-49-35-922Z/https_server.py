@@ -2,42 +2,1843 @@
 """
 Simple HTTPS server for testing Google APIs
 Google APIs often require HTTPS for security reasons
+
+Serves the current directory over HTTP/1.1 with persistent connections.
+Each connection is handled by a bounded pool of worker threads, so one slow
+client no longer stalls everyone else testing against the dashboard.
+Text assets are compressed once per (path, mtime) and served from a memory +
+disk cache according to the client's Accept-Encoding. Every file carries a
+strong ETag and a per-extension Cache-Control, and conditional requests
+(If-None-Match / If-Modified-Since) get 304s, like the production CDN.
+Files are sent with sendfile() on plain TCP (chunked buffer copies under TLS)
+and single or multi-part byte ranges are supported, so media can be seeked.
+Small hot files are kept in memory and re-stat'ed at most once a second.
+Request latency is exported as Prometheus histograms on /__metrics.
+Admission control keeps it responsive under load: a bounded connection
+queue with fast 503s past it, optional per-client rate limits, and a
+deadline on handshakes/headers against slowloris clients.
+With --api, the api/ routes the pages call are emulated from the local JSON
+files instead of hitting production.
+With --render-pdf, /__pdf/pitch.pdf is built by linked_pdf_converter.py and
+cached until one of its inputs changes.
+
+Usage:
+    python3 https_server.py [--port 8443] [--workers 32] [--keepalive 15]
+                            [--cache-dir .https_cache] [--no-compress]
+                            [--cache-control png='public, max-age=60' ...] [--plain-http]
+                            [--hot-cache-mb 64] [--hot-revalidate 1.0]
+                            [--cert-key ecdsa|rsa2048|rsa4096] [--no-session-tickets]
+                            [--access-log access.jsonl] [--processes 4]
+                            [--api [--api-data-dir .]] [--render-pdf]
+                            [--max-queue 64] [--max-connections N] [--rate-limit R [--rate-burst B]]
+                            [--header-timeout 10] [--retry-after 1]
+    python3 https_server.py --bench-handshakes 500 [--cert-key rsa4096]
 """
+import argparse
+import base64
+import contextlib
+import datetime
+import email.utils
+import fcntl
+import gzip
+import hashlib
 import http.server
-import socketserver
+import importlib.util
+import io
+import json
+import math
 import ssl
 import os
+import queue
+import select
+import shutil
+import signal
+import socket
+import stat
 import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
 PORT = 8443
+DEFAULT_WORKERS = 32
+KEEPALIVE_TIMEOUT = 15
+CACHE_DIR = '.https_cache'
+CACHE_MEMORY_MB = 64
+CACHE_DISK_MB = 256
+HOT_CACHE_MB = 64
+# Hot files are re-stat'ed at most this often (seconds); edits show up within it
+HOT_REVALIDATE_S = 1.0
+# Larger files (media) stay on the sendfile path instead of pinning memory
+HOT_MAX_FILE_BYTES = 4 << 20
+# Below this size compression isn't worth the extra header bytes
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/xml', 'image/svg+xml')
+# Buffer for copying file ranges onto TLS sockets, where sendfile() can't be used
+COPY_BUFFER_SIZE = 256 * 1024
+# Multi-range requests with more ranges than this get the whole file (RFC 7233 section 6.1)
+MAX_RANGES = 32
+# Upper bounds (seconds) of the request-latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Distinct path prefixes tracked before the rest are folded into "other"
+MAX_METRIC_PREFIXES = 64
+# Prefixes served by the handler itself rather than from a directory
+METRIC_ROUTE_PREFIXES = ('/api', '/__pdf')
+# Prefork workers write their metrics snapshot this often (seconds)
+METRICS_FLUSH_S = 2.0
+# Seconds a retiring worker gets to finish in-flight requests after SIGTERM
+GRACEFUL_TIMEOUT = 30
+# Load shedding: connections allowed to wait for a worker thread, and how
+# many (served + waiting) a process holds before answering 503 straight away
+MAX_QUEUE = 64
+# Request line + headers (and the TLS handshake) must arrive within this many seconds
+HEADER_TIMEOUT = 10
+# Retry-After (seconds) sent with 503/429 responses
+RETRY_AFTER_S = 1
+# Threads that write 503s for shed connections; beyond SHED_MAX_INFLIGHT they are just closed
+SHED_WORKERS = 4
+SHED_MAX_INFLIGHT = 256
+SHED_TIMEOUT = 2
+RATE_LIMIT_MAX_CLIENTS = 10000
+# Write-behind delay (seconds) for the API emulator's JSON files
+API_FLUSH_S = 0.5
+USER_STATUS_OPTIONS = {
+    'projectStatus': ['upcoming', 'in-progress', 'completed', 'cancelled'],
+    'paymentStatus': ['pending', 'processing', 'paid', 'overdue'],
+}
+# On-demand PDFs: Chrome time limit, renders running at once, how long a failure is remembered
+PDF_RENDER_TIMEOUT = 120
+PDF_MAX_RENDERS = 2
+PDF_RETRY_S = 30
+# Self-signed certificate per key type; ECDSA P-256 is far cheaper to sign with
+# than RSA, and rsa4096 keeps the original server.crt/server.key
+CERT_FILES = {
+    'ecdsa': ('server-ecdsa.crt', 'server-ecdsa.key'),
+    'rsa2048': ('server-rsa2048.crt', 'server-rsa2048.key'),
+    'rsa4096': ('server.crt', 'server.key'),
+}
+CERT_KEY_ARGS = {
+    'ecdsa': ['-newkey', 'ec', '-pkeyopt', 'ec_paramgen_curve:prime256v1'],
+    'rsa2048': ['-newkey', 'rsa:2048'],
+    'rsa4096': ['-newkey', 'rsa:4096'],
+}
+DEFAULT_CERT_KEY = 'ecdsa'
+# TLS 1.2 fallbacks: forward-secret AEAD only, matching either certificate type
+TLS12_CIPHERS = 'ECDHE+AESGCM:ECDHE+CHACHA20'
+# Cache-Control by file extension, mirroring the production CDN: pages and data
+# revalidate every time (cheap with ETags), static assets are cached
+DEFAULT_CACHE_POLICY = {
+    'html': 'no-cache',
+    'htm': 'no-cache',
+    'json': 'no-cache',
+    'js': 'public, max-age=3600',
+    'css': 'public, max-age=3600',
+    'png': 'public, max-age=86400',
+    'jpg': 'public, max-age=86400',
+    'jpeg': 'public, max-age=86400',
+    'gif': 'public, max-age=86400',
+    'svg': 'public, max-age=86400',
+    'ico': 'public, max-age=86400',
+    'ttf': 'public, max-age=604800',
+    'woff': 'public, max-age=604800',
+    'woff2': 'public, max-age=604800',
+    'mp3': 'public, max-age=86400',
+    'mp4': 'public, max-age=86400',
+    'pdf': 'public, max-age=3600',
+    'default': 'no-cache',
+}
+
+def negotiate_encoding(accept_encoding):
+    """Pick the best supported Content-Encoding from an Accept-Encoding header (None = identity)"""
+    offered = {}
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            offered[name.strip().lower()] = q
+    for encoding in ('br', 'gzip'):
+        if encoding == 'br' and brotli is None:
+            continue
+        if offered.get(encoding, offered.get('*', 0)) > 0:
+            return encoding
+    return None
+
+def parse_byte_ranges(range_header, size):
+    """Parse a Range header into sorted, merged (start, end) pairs, ends inclusive.
+
+    Returns None when the header should be ignored (bad syntax, other units,
+    too many ranges) and [] when no range is satisfiable.
+    """
+    unit, sep, spec = range_header.partition('=')
+    if unit.strip().lower() != 'bytes' or not sep:
+        return None
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, dash, last = part.partition('-')
+        first, last = first.strip(), last.strip()
+        if not dash or (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:
+            # Suffix range: the final N bytes
+            if not last:
+                return None
+            length = int(last)
+            if length and size:
+                ranges.append((max(0, size - length), size - 1))
+            continue
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < size:
+            end = int(last) if last else size - 1
+            ranges.append((start, min(end, size - 1)))
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    if len(merged) > MAX_RANGES:
+        return None
+    return merged
+
+class FileBody:
+    """Response body made of file ranges and literal bytes, written by HTTPSHandler.copyfile"""
+
+    def __init__(self, f, parts):
+        self.f = f
+        # Each part is either bytes or an (offset, count) slice of f
+        self.parts = parts
+
+    def __len__(self):
+        return sum(len(part) if isinstance(part, bytes) else part[1] for part in self.parts)
+
+    def __bool__(self):
+        # SimpleHTTPRequestHandler tests `if f:` before copying and closing, and an empty file is len() 0
+        return True
+
+    def close(self):
+        self.f.close()
+
+class ETagCache:
+    """Strong ETags (content hashes) memoised by (device, inode, mtime, size)"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._tags = OrderedDict()
+        self._lock = threading.Lock()
+
+    def etag(self, path, st, f=None):
+        key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            tag = self._tags.get(key)
+            if tag is not None:
+                self._tags.move_to_end(key)
+                return tag
+        digest = hashlib.sha256()
+        if f is not None:
+            pos = f.tell()
+            f.seek(0)
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+            f.seek(pos)
+        else:
+            with open(path, 'rb') as src:
+                for chunk in iter(lambda: src.read(1 << 20), b''):
+                    digest.update(chunk)
+        tag = f'"{digest.hexdigest()[:32]}"'
+        with self._lock:
+            self._tags[key] = tag
+            if len(self._tags) > self.max_entries:
+                self._tags.popitem(last=False)
+        return tag
+
+class CompressionCache:
+    """Compressed file bodies keyed by (path, mtime, size, encoding).
+
+    Lookups go memory -> disk -> compress. Both tiers are size-bounded with LRU
+    eviction; a changed file gets a new key, so stale entries simply age out.
+    """
+
+    SUFFIX = {'gzip': '.gz', 'br': '.br'}
+
+    def __init__(self, cache_dir=CACHE_DIR, max_memory_bytes=CACHE_MEMORY_MB << 20, max_disk_bytes=CACHE_DISK_MB << 20):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._disk_bytes = sum(e.stat().st_size for e in os.scandir(cache_dir) if e.is_file())
+
+    def _key(self, path, st, encoding):
+        raw = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{encoding}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest() + self.SUFFIX[encoding]
+
+    def get(self, path, st, encoding):
+        key = self._key(path, st, encoding)
+        with self._lock:
+            body = self._memory.get(key)
+            if body is not None:
+                self._memory.move_to_end(key)
+                return body
+        disk_path = os.path.join(self.cache_dir, key)
+        try:
+            with open(disk_path, 'rb') as f:
+                body = f.read()
+            os.utime(disk_path)  # mtime doubles as the disk LRU clock
+        except OSError:
+            body = self._compress(path, encoding)
+            self._write_disk(disk_path, body)
+        self._remember(key, body)
+        return body
+
+    def _compress(self, path, encoding):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        if encoding == 'br':
+            return brotli.compress(raw, quality=11)
+        return gzip.compress(raw, compresslevel=9, mtime=0)
+
+    def _remember(self, key, body):
+        with self._lock:
+            if key in self._memory or len(body) > self.max_memory_bytes:
+                return
+            self._memory[key] = body
+            self._memory_bytes += len(body)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _write_disk(self, disk_path, body):
+        tmp = f"{disk_path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, disk_path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes += len(body)
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        entries = sorted((e for e in os.scandir(self.cache_dir) if e.is_file()), key=lambda e: e.stat().st_mtime)
+        total = sum(e.stat().st_size for e in entries)
+        for entry in entries:
+            if total <= self.max_disk_bytes * 0.9:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+class HotFile:
+    __slots__ = ('data', 'st', 'checked')
+
+    def __init__(self, data, st, checked):
+        self.data = data
+        self.st = st
+        self.checked = checked
+
+class HotFileCache:
+    """In-memory file bytes + stat for the handful of files every test run hits.
+
+    Entries are trusted for revalidate_s seconds, then re-stat'ed; a changed
+    inode/mtime/size reloads the file. Concurrent misses on one path share a
+    single read. Size-bounded with LRU eviction.
+    """
+
+    def __init__(self, max_bytes=HOT_CACHE_MB << 20, revalidate_s=HOT_REVALIDATE_S, max_file_bytes=HOT_MAX_FILE_BYTES):
+        self.max_bytes = max_bytes
+        self.revalidate_s = revalidate_s
+        self.max_file_bytes = min(max_file_bytes, max_bytes)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, path):
+        """Return a HotFile for path, or None if it isn't cacheable (missing, a directory, too big)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and now - entry.checked < self.revalidate_s:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            load = self._loading.get(path)
+            leader = load is None
+            if leader:
+                load = self._loading[path] = {'done': threading.Event(), 'entry': None}
+        if not leader:
+            load['done'].wait()
+            with self._lock:
+                self.coalesced += 1
+            return load['entry']
+        result = None
+        try:
+            result = self._load(path, entry, now)
+        finally:
+            with self._lock:
+                del self._loading[path]
+                self._store(path, entry, result)
+            load['entry'] = result
+            load['done'].set()
+        return result
+
+    def _load(self, path, entry, now):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode) or st.st_size > self.max_file_bytes:
+            return None
+        if entry is not None and (entry.st.st_ino, entry.st.st_mtime_ns, entry.st.st_size) == \
+                (st.st_ino, st.st_mtime_ns, st.st_size):
+            with self._lock:
+                self.revalidations += 1
+            return HotFile(entry.data, entry.st, now)
+        try:
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                data = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            self.misses += 1
+        if len(data) != st.st_size:  # modified mid-read; let the caller go to disk
+            return None
+        return HotFile(data, st, now)
+
+    def _store(self, path, old, new):
+        """Swap old for new under the lock, evicting least-recently-used entries"""
+        if old is not None and self._entries.get(path) is old:
+            del self._entries[path]
+            self._bytes -= len(old.data)
+        if new is None:
+            return
+        self._entries[path] = new
+        self._bytes += len(new.data)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.data)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+class RequestMetrics:
+    """Fixed-bucket latency histograms keyed by (path prefix, status)
+
+    Only prefixes that are a handler route or a top-level directory of the
+    served root get their own series; any other path counts as "other", so
+    clients can't mint labels.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, root='.'):
+        self.buckets = tuple(buckets)
+        self.root = root
+        self._series = {}
+        self._prefixes = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def prefix_for(path):
+        """'/api/users?x=1' -> '/api'; files in the site root share '/'"""
+        path = path.split('?', 1)[0].split('#', 1)[0]
+        head, sep, _ = path.lstrip('/').partition('/')
+        return f"/{head}" if sep else '/'
+
+    def label_for(self, path):
+        """prefix_for(path) if it is '/', a route or a served directory, else 'other'"""
+        prefix = self.prefix_for(path)
+        if prefix == '/' or prefix in METRIC_ROUTE_PREFIXES:
+            return prefix
+        name = urllib.parse.unquote(prefix[1:])
+        if name not in ('.', '..') and '/' not in name and '\0' not in name \
+                and os.path.isdir(os.path.join(self.root, name)):
+            return prefix
+        return 'other'
+
+    def observe(self, path, status, seconds):
+        prefix = self.label_for(path)
+        with self._lock:
+            if prefix not in self._prefixes:
+                if len(self._prefixes) >= MAX_METRIC_PREFIXES:
+                    prefix = 'other'
+                else:
+                    self._prefixes.add(prefix)
+            series = self._series.get((prefix, status))
+            if series is None:
+                series = self._series[(prefix, status)] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            i = 0
+            while i < len(self.buckets) and seconds > self.buckets[i]:
+                i += 1
+            series['counts'][i] += 1
+            series['sum'] += seconds
+
+    def snapshot(self):
+        """Plain-dict copy of the histograms (non-cumulative counts, last slot is +Inf)"""
+        with self._lock:
+            return {
+                'buckets': list(self.buckets),
+                'series': [{'prefix': p, 'status': st, 'counts': list(v['counts']), 'sum': v['sum']}
+                           for (p, st), v in sorted(self._series.items())],
+            }
+
+def _label_value(value):
+    """A label value escaped for the text format: backslash, double quote and newline"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_prometheus(snapshot, extra_counters=None):
+    """Prometheus text exposition (format 0.0.4) of a RequestMetrics snapshot"""
+    lines = [
+        '# HELP https_request_duration_seconds Server-side request latency by path prefix and status.',
+        '# TYPE https_request_duration_seconds histogram',
+    ]
+    bounds = [repr(float(b)) for b in snapshot['buckets']] + ['+Inf']
+    for series in snapshot['series']:
+        labels = f'prefix="{_label_value(series["prefix"])}",status="{series["status"]}"'
+        running = 0
+        for bound, count in zip(bounds, series['counts']):
+            running += count
+            lines.append(f'https_request_duration_seconds_bucket{{{labels},le="{bound}"}} {running}')
+        lines.append(f'https_request_duration_seconds_sum{{{labels}}} {series["sum"]:.6f}')
+        lines.append(f'https_request_duration_seconds_count{{{labels}}} {running}')
+    for name, (help_text, value) in (extra_counters or {}).items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {"counter" if name.endswith("_total") else "gauge"}')
+        lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+def merge_metric_snapshots(snapshots):
+    """Sum per-process metrics snapshots (see ThreadPoolHTTPServer.metrics_snapshot)"""
+    series = {}
+    counters = {}
+    buckets = list(LATENCY_BUCKETS)
+    for snapshot in snapshots:
+        buckets = snapshot['requests']['buckets']
+        for item in snapshot['requests']['series']:
+            key = (item['prefix'], item['status'])
+            merged = series.get(key)
+            if merged is None:
+                series[key] = {'prefix': item['prefix'], 'status': item['status'],
+                               'counts': list(item['counts']), 'sum': item['sum']}
+            else:
+                merged['counts'] = [a + b for a, b in zip(merged['counts'], item['counts'])]
+                merged['sum'] += item['sum']
+        for name, (help_text, value) in snapshot['counters'].items():
+            counters[name] = (help_text, counters.get(name, (help_text, 0))[1] + value)
+    return {'requests': {'buckets': buckets, 'series': [series[k] for k in sorted(series)]}, 'counters': counters}
+
+class AccessLog:
+    """JSON-lines access log; request threads only enqueue, one writer thread does the I/O"""
+
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=100000)
+        self._thread = threading.Thread(target=self._run, name='access-log', daemon=True)
+        self._thread.start()
+
+    def write(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            # Never stall a request on logging
+            self.dropped += 1
+
+    def _run(self):
+        # Batches of whole lines go out in single O_APPEND writes, so prefork
+        # workers can share one log file without interleaving partial lines
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            pending = []
+            last_flush = time.monotonic()
+            while True:
+                try:
+                    record = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    record = False
+                if record:
+                    pending.append(json.dumps(record, separators=(',', ':')) + '\n')
+                if pending and (record is None or len(pending) >= 1000
+                                or time.monotonic() - last_flush >= self.flush_interval):
+                    os.write(fd, ''.join(pending).encode('utf-8'))
+                    pending = []
+                    last_flush = time.monotonic()
+                if record is None:
+                    break
+        finally:
+            os.close(fd)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+class JsonStore:
+    """One JSON document held in memory and persisted behind the requests.
+
+    Mutations happen under `lock` and end with mark_dirty(); the emulator's
+    flusher thread writes dirty stores with tmp + fsync + rename, so readers
+    of the file never see a half-written document.
+    """
+
+    def __init__(self, path, default):
+        self.path = path
+        self.lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._version = 0
+        self._flushed = 0
+        self._rendered = (None, b'')
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.data = json.load(f)
+        except FileNotFoundError:
+            self.data = default
+
+    def mark_dirty(self):
+        """Call with `lock` held after changing `data`"""
+        self._version += 1
+
+    def render(self):
+        """Serialized document, re-encoded only after a change"""
+        with self.lock:
+            if self._rendered[0] != self._version:
+                self._rendered = (self._version, json.dumps(self.data, ensure_ascii=False).encode('utf-8'))
+            return self._rendered[1]
+
+    def flush(self):
+        with self._write_lock:
+            with self.lock:
+                if self._version == self._flushed:
+                    return False
+                version = self._version
+                # Same layout as the Vercel functions' JSON.stringify(data, null, 2)
+                text = json.dumps(self.data, indent=2, ensure_ascii=False)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._flushed = version
+            return True
+
+def merge_patch(target, patch):
+    """JSON merge patch (RFC 7386): nested objects merge, null deletes a key"""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+class ApiEmulator:
+    """Local stand-in for the Vercel functions under api/, backed by the repo's JSON files.
+
+    Serves the pre-Firestore behaviour the pages still call: users, jobs,
+    notifications and contracts come from users.json, job-data.json,
+    notifications.json and uploaded-contracts.json in data_dir, and writes go
+    back to those files (never to GitHub or production).
+    """
+
+    def __init__(self, data_dir='.', flush_interval=API_FLUSH_S):
+        self.data_dir = data_dir
+        self.flush_interval = flush_interval
+        today = datetime.date.today().isoformat()
+        self.users = JsonStore(os.path.join(data_dir, 'users.json'), {
+            'users': {}, 'statusOptions': USER_STATUS_OPTIONS, 'lastUpdated': today, 'totalUsers': 0,
+            'system': {'totalReviews': 0, 'lastUpdated': today},
+        })
+        self.jobs = JsonStore(os.path.join(data_dir, 'job-data.json'), {'jobs': []})
+        self.notifications = JsonStore(os.path.join(data_dir, 'notifications.json'), {
+            'notifications': [], 'lastUpdated': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        })
+        self.contracts = JsonStore(os.path.join(data_dir, 'uploaded-contracts.json'), {
+            'uploadedContracts': [], 'lastUpdated': today, 'totalContracts': 0,
+        })
+        self.contracts_dir = os.path.join(data_dir, 'contracts')
+        self._set_notification_counts(self.notifications.data)
+        # Lower-cased name / email -> key in users.json
+        self._by_name = {}
+        self._by_email = {}
+        self._reindex_users()
+        # Lower-cased name -> [lock, holders] while someone holds or waits for it
+        self._user_locks = {}
+        self._user_locks_guard = threading.Condition()
+        self._replacing = False
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name='api-flush', daemon=True)
+        self._flusher.start()
+
+    @property
+    def stores(self):
+        return (self.users, self.jobs, self.notifications, self.contracts)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        for store in self.stores:
+            try:
+                store.flush()
+            except OSError as e:
+                print(f"⚠️  Could not write {store.path}: {e}")
+
+    def close(self):
+        self._stop.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+
+    @contextlib.contextmanager
+    def _user_lock(self, name):
+        """Hold name's lock (any capitalization); waits out a whole-document replace"""
+        key = name.lower()
+        with self._user_locks_guard:
+            self._user_locks_guard.wait_for(lambda: not self._replacing)
+            entry = self._user_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._user_locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._user_locks[key]
+                    self._user_locks_guard.notify_all()
+
+    @contextlib.contextmanager
+    def _all_users_lock(self):
+        """Exclude every single-user writer, for a whole-document replace"""
+        with self._user_locks_guard:
+            self._user_locks_guard.wait_for(lambda: not self._replacing)
+            self._replacing = True
+            self._user_locks_guard.wait_for(lambda: not self._user_locks)
+        try:
+            yield
+        finally:
+            with self._user_locks_guard:
+                self._replacing = False
+                self._user_locks_guard.notify_all()
+
+    def _reindex_users(self):
+        """Rebuild both indexes; call with users.lock held"""
+        self._by_name = {}
+        self._by_email = {}
+        for name, user in self.users.data.get('users', {}).items():
+            self._index_user(name, user)
+
+    @staticmethod
+    def _email_of(user):
+        email = ((user or {}).get('profile') or {}).get('email')
+        return email.lower() if isinstance(email, str) and email else None
+
+    def _index_user(self, name, user):
+        self._by_name[name.lower()] = name
+        email = self._email_of(user)
+        if email:
+            # Several users can share an email; like the pages' find(), the first one wins
+            self._by_email.setdefault(email, name)
+
+    def _unindex_user(self, name, user):
+        self._by_name.pop(name.lower(), None)
+        email = self._email_of(user)
+        if email and self._by_email.get(email) == name:
+            del self._by_email[email]
+            for other, other_user in self.users.data.get('users', {}).items():
+                if other != name and self._email_of(other_user) == email:
+                    self._by_email[email] = other
+                    break
+
+    def find_user(self, name=None, email=None):
+        with self.users.lock:
+            key = self._by_email.get(email.lower()) if email else self._by_name.get((name or '').lower())
+            if key is None:
+                return None, None
+            return key, self.users.data['users'].get(key)
+
+    def handle(self, handler):
+        """Answer handler's request if it is an emulated route; False means not ours"""
+        url = urllib.parse.urlsplit(handler.path)
+        route = url.path.rstrip('/')
+        query = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        endpoint = {
+            '/api/users': self.api_users,
+            '/api/update-users': self.api_update_users,
+            '/api/jobs-data': self.api_jobs_data,
+            '/api/notifications': self.api_notifications,
+            '/api/contracts': self.api_contracts,
+        }.get(route)
+        if endpoint is None:
+            return False
+        body = None
+        if handler.command in ('POST', 'PUT'):
+            try:
+                body = handler.read_json_body()
+            except ValueError as e:
+                handler.send_json(400, {'success': False, 'error': f'Invalid JSON body: {e}'})
+                return True
+        try:
+            status, payload = endpoint(handler.command, query, body)
+        except OSError as e:
+            handler.send_json(500, {'success': False, 'error': f'Storage error: {e.strerror or e}'})
+            return True
+        if status == 'file':
+            handler.send_pdf(payload)
+        else:
+            # payload is a dict, or a store's pre-serialized document
+            handler.send_json(status, payload)
+        return True
+
+    def api_users(self, method, query, body):
+        if method != 'GET':
+            return 405, {'error': 'Method not allowed'}
+        if 'email' in query or 'name' in query:
+            name, user = self.find_user(query.get('name'), query.get('email'))
+            if user is None:
+                return 404, {'success': False, 'error': 'User not found'}
+            return 200, {'success': True, 'name': name, 'user': user}
+        return 200, self.users.render()
+
+    def api_update_users(self, method, query, body):
+        if method not in ('POST', 'PUT'):
+            return 405, {'error': 'Method not allowed'}
+        body = body if isinstance(body, dict) else {}
+        users, action, user_name = body.get('users'), body.get('action'), body.get('userName')
+        if users is not None:
+            if not isinstance(users, dict):
+                return 400, {'error': 'users must be an object keyed by user name'}
+            # Whole-document replace, as api/update-users.js does
+            today = datetime.date.today().isoformat()
+            with self._all_users_lock(), self.users.lock:
+                self.users.data = {
+                    'users': users, 'statusOptions': USER_STATUS_OPTIONS, 'lastUpdated': today,
+                    'totalUsers': len(users), 'system': {'totalReviews': 0, 'lastUpdated': today},
+                }
+                self._reindex_users()
+                self.users.mark_dirty()
+        elif user_name and (action == 'delete' or isinstance(body.get('user'), dict)):
+            # Single-user change: only that user's lock is held while it is merged
+            with self._user_lock(user_name):
+                name, current = self.find_user(name=user_name)
+                name = name or user_name
+                if action == 'delete':
+                    if current is None:
+                        return 404, {'success': False, 'error': 'User not found'}
+                    updated = None
+                elif action == 'replace':
+                    updated = body['user']
+                else:
+                    updated = merge_patch(current, body['user'])
+                with self.users.lock:
+                    table = self.users.data.setdefault('users', {})
+                    self._unindex_user(name, table.get(name))
+                    if updated is None:
+                        table.pop(name, None)
+                    else:
+                        table[name] = updated
+                        self._index_user(name, updated)
+                    self.users.data['totalUsers'] = len(table)
+                    self.users.data['lastUpdated'] = datetime.date.today().isoformat()
+                    self.users.mark_dirty()
+        else:
+            return 400, {'error': 'users data is required'}
+        with self.users.lock:
+            total = len(self.users.data.get('users', {}))
+        return 200, {
+            'success': True,
+            'message': 'Users data updated successfully',
+            'localUpdated': True,
+            'githubUpdated': False,
+            'githubMessage': 'Local API emulator: GitHub not contacted',
+            'totalUsers': total,
+            'lastUpdated': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+
+    def api_jobs_data(self, method, query, body):
+        if method != 'GET':
+            return 405, {'error': 'Method not allowed'}
+        return 200, self.jobs.render()
+
+    @staticmethod
+    def _set_notification_counts(data):
+        notifications = data.get('notifications') or []
+        data['totalNotifications'] = len(notifications)
+        data['unreadCount'] = sum(1 for n in notifications if not (isinstance(n, dict) and n.get('read')))
+
+    def api_notifications(self, method, query, body):
+        if method == 'GET':
+            return 200, self.notifications.render()
+        if method != 'POST':
+            return 405, {'success': False, 'error': 'Method not allowed'}
+        notifications = (body or {}).get('notifications') if isinstance(body, dict) else None
+        if not isinstance(notifications, list):
+            return 400, {'success': False, 'error': 'Invalid notifications data'}
+        with self.notifications.lock:
+            data = self.notifications.data
+            data['notifications'] = notifications
+            data['lastUpdated'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            self._set_notification_counts(data)
+            self.notifications.mark_dirty()
+            return 200, {
+                'success': True,
+                'message': 'Notifications updated successfully',
+                'totalNotifications': data['totalNotifications'],
+                'unreadCount': data['unreadCount'],
+            }
+
+    @staticmethod
+    def _contract_name(filename):
+        """The bare file name of a contract PDF, or None if it isn't one"""
+        safe_name = os.path.basename(str(filename))
+        if safe_name in ('', '.', '..') or not safe_name.endswith('.pdf'):
+            return None
+        return safe_name
+
+    def api_contracts(self, method, query, body):
+        if method == 'GET':
+            filename = query.get('filename')
+            if not filename:
+                return 200, self.contracts.render()
+            safe_name = self._contract_name(filename)
+            if safe_name is None:
+                return 400, {'error': 'Only PDF files are allowed'}
+            path = os.path.join(self.contracts_dir, safe_name)
+            if not os.path.isfile(path):
+                return 404, {'error': 'PDF file not found'}
+            return 'file', path
+        if method != 'POST':
+            return 405, {'error': 'Method not allowed'}
+        body = body if isinstance(body, dict) else {}
+        contract_id, pdf_content = body.get('contractId'), body.get('pdfContent')
+        if not contract_id or not pdf_content:
+            return 400, {'error': 'contractId and pdfContent are required'}
+        file_name = body.get('fileName')
+        safe_name = self._contract_name(f"{contract_id}.pdf" if file_name is None else file_name)
+        if safe_name is None:
+            return 400, {'error': 'Only PDF files are allowed'}
+        try:
+            pdf = base64.b64decode(pdf_content, validate=True)
+        except ValueError:
+            return 400, {'error': 'pdfContent must be base64'}
+        os.makedirs(self.contracts_dir, exist_ok=True)
+        path = os.path.join(self.contracts_dir, safe_name)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(pdf)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        entry = {
+            'contractId': contract_id,
+            'freelancerName': body.get('freelancerName'),
+            'fileName': safe_name,
+            'fileSize': len(pdf),
+            'uploadDate': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'status': 'uploaded',
+            'githubUrl': f"/api/contracts?filename={urllib.parse.quote(safe_name)}",
+        }
+        with self.contracts.lock:
+            data = self.contracts.data
+            entries = [c for c in data.get('uploadedContracts', []) if c.get('contractId') != contract_id]
+            entries.append(entry)
+            data['uploadedContracts'] = entries
+            data['totalContracts'] = len(entries)
+            data['lastUpdated'] = datetime.date.today().isoformat()
+            self.contracts.mark_dirty()
+        return 200, {
+            'success': True,
+            'contractId': contract_id,
+            'filename': f"contracts/{safe_name}",
+            'downloadUrl': entry['githubUrl'],
+            'sha': hashlib.sha1(pdf).hexdigest(),
+        }
+
+class PdfRenderer:
+    """Builds the linked_pdf_converter documents on demand, cached by a hash of every input.
+
+    The key covers each input file's content (the converter itself included,
+    it holds the template) and the Chrome binary, so a render is reused until
+    one of them changes. Concurrent requests for a document share one render
+    job; a lock file extends that to prefork siblings.
+    """
+
+    def __init__(self, converter, base_dir, cache_dir, max_renders=PDF_MAX_RENDERS, timeout=PDF_RENDER_TIMEOUT):
+        self.converter = converter
+        self.documents = converter.DOCUMENTS
+        self.base_dir = base_dir
+        self.cache_dir = os.path.join(cache_dir, 'pdf')
+        self.timeout = timeout
+        self.etag_cache = ETagCache()
+        self._slots = threading.Semaphore(max_renders)
+        self._rendering = {}
+        self._failed = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+        self.coalesced = 0
+        self.failures = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @classmethod
+    def load(cls, base_dir, cache_dir):
+        """PdfRenderer for base_dir/linked_pdf_converter.py, or None if there is no converter"""
+        path = os.path.join(base_dir, 'linked_pdf_converter.py')
+        if not os.path.isfile(path):
+            return None
+        spec = importlib.util.spec_from_file_location('linked_pdf_converter', path)
+        converter = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(converter)
+        return cls(converter, base_dir, cache_dir)
+
+    def input_key(self, name):
+        digest = hashlib.sha256(name.encode())
+        for path in self.documents[name]['inputs'](self.base_dir):
+            try:
+                tag = self.etag_cache.etag(path, os.stat(path))
+            except OSError:
+                tag = 'missing'
+            digest.update(f"\0{os.path.basename(path)}\0{tag}".encode())
+        chrome = self.converter.find_chrome()
+        if chrome:
+            st = os.stat(chrome)
+            digest.update(f"\0{os.path.realpath(chrome)}\0{st.st_mtime_ns}\0{st.st_size}".encode())
+        digest.update('\0'.join(self.converter.CHROME_PDF_FLAGS).encode())
+        return digest.hexdigest()[:32]
+
+    def render(self, name):
+        """Return (open file, etag, None) for document name, or (None, None, error)"""
+        key = self.input_key(name)
+        path = os.path.join(self.cache_dir, f"{name}-{key}.pdf")
+        try:
+            f = open(path, 'rb')
+            with self._lock:
+                self.hits += 1
+            return f, f'"{key}"', None
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            failed = self._failed.get(name)
+            if failed is not None and failed[0] == key and time.monotonic() - failed[1] < PDF_RETRY_S:
+                return None, None, failed[2]
+            job = self._rendering.get(key)
+            leader = job is None
+            if leader:
+                job = self._rendering[key] = {'done': threading.Event(), 'error': None}
+            else:
+                self.coalesced += 1
+        if leader:
+            try:
+                job['error'] = self._render_locked(name, key, path)
+            except Exception as e:
+                job['error'] = f"{type(e).__name__}: {e}"
+            finally:
+                with self._lock:
+                    del self._rendering[key]
+                    if job['error']:
+                        self.failures += 1
+                        self._failed[name] = (key, time.monotonic(), job['error'])
+                    else:
+                        self._failed.pop(name, None)
+                job['done'].set()
+        else:
+            job['done'].wait()
+        if job['error']:
+            return None, None, job['error']
+        try:
+            return open(path, 'rb'), f'"{key}"', None
+        except OSError as e:
+            return None, None, str(e)
+
+    def _render_locked(self, name, key, path):
+        """Render unless a prefork sibling got there first; returns an error message or None"""
+        with self._slots, open(os.path.join(self.cache_dir, f"{name}.lock"), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if os.path.exists(path):
+                return None
+            doc = self.documents[name]
+            html = doc['html'](self.base_dir)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            try:
+                ok, error = self.converter.render_html_to_pdf(html, os.path.abspath(tmp), timeout=self.timeout)
+                if not ok:
+                    return error
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+            with self._lock:
+                self.renders += 1
+            # Older renders of this document are stale now (open handles keep serving)
+            for stale in Path(self.cache_dir).glob(f"{name}-*.pdf"):
+                if stale.name != os.path.basename(path):
+                    stale.unlink(missing_ok=True)
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {'documents': sorted(self.documents), 'hits': self.hits, 'renders': self.renders,
+                    'coalesced': self.coalesced, 'failures': self.failures, 'rendering': len(self._rendering)}
+
+class RateLimiter:
+    """Token bucket per client address: `rate` requests/second, bursts of up to `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.limited = 0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def check(self, client):
+        """0 if the request may proceed, otherwise seconds until the client earns a token"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                if len(self._buckets) >= RATE_LIMIT_MAX_CLIENTS:
+                    self._prune(now)
+                bucket = (self.burst, now)
+            tokens, last = bucket
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._buckets[client] = (tokens - 1, now)
+                return 0
+            self._buckets[client] = (tokens, now)
+            self.limited += 1
+            return (1 - tokens) / self.rate
+
+    def _prune(self, now):
+        # A bucket that has refilled is indistinguishable from a new one
+        self._buckets = {c: (t, last) for c, (t, last) in self._buckets.items()
+                         if t + (now - last) * self.rate < self.burst}
+
+class DeadlineReaper:
+    """Shuts down sockets that overrun a deadline, e.g. slowloris handshakes or headers.
+
+    A blocked read on the socket then returns EOF, so the worker thread gets
+    back to the pool instead of waiting on a client that trickles bytes.
+    """
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.reaped = 0
+        self._deadlines = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        threading.Thread(target=self._run, name='deadline-reaper', daemon=True).start()
+
+    def watch(self, sock, seconds):
+        """Start a deadline; an earlier one already running for sock is kept"""
+        deadline = time.monotonic() + seconds
+        with self._lock:
+            self._deadlines[sock] = min(deadline, self._deadlines.get(sock, deadline))
+
+    def unwatch(self, sock):
+        with self._lock:
+            self._deadlines.pop(sock, None)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            with self._lock:
+                expired = [sock for sock, deadline in self._deadlines.items() if deadline <= now]
+                for sock in expired:
+                    del self._deadlines[sock]
+                self.reaped += len(expired)
+            for sock in expired:
+                try:
+                    # The plain-socket shutdown, even for SSLSocket: the TLS
+                    # state belongs to the worker thread blocked in read()
+                    socket.socket.shutdown(sock, socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def close(self):
+        self._stop.set()
 
 class HTTPSHandler(http.server.SimpleHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests; SimpleHTTPRequestHandler
+    # always sends Content-Length, so pipelined requests are answered in order.
+    protocol_version = 'HTTP/1.1'
+    # Idle keep-alive connections are closed after this many seconds
+    timeout = KEEPALIVE_TIMEOUT
+
+    def parse_request(self):
+        # Per-request state; the handler instance lives for the whole connection
+        self._vary_encoding = False
+        # Timed from the parsed request line, so keep-alive idle time isn't counted
+        self._request_start = time.perf_counter()
+        self._status = None
+        self._response_bytes = 0
+        # A malformed request line is answered before the path and headers are
+        # parsed; don't let the access log see the previous request's
+        self.path = ''
+        self.headers = None
+        ok = super().parse_request()
+        # Headers are in; the header deadline no longer applies (bodies and
+        # downloads are only bounded by the per-read idle timeout)
+        self.server.reaper.unwatch(self.connection)
+        if not ok:
+            return False
+        limiter = self.server.rate_limiter
+        if limiter is not None:
+            wait = limiter.check(self.client_address[0])
+            if wait:
+                self._send_busy(429, "Too many requests from this client", wait)
+                return False
+        return True
+
+    def handle_one_request(self):
+        self._request_start = None
+        try:
+            # Idle keep-alive wait: up to `timeout` for the first byte of the next request
+            if not self.rfile.peek(1):
+                self.close_connection = True
+                return
+        except OSError:
+            self.close_connection = True
+            return
+        # From the first byte on, the request line and headers get header_timeout in total
+        self.server.reaper.watch(self.connection, self.server.header_timeout)
+        try:
+            super().handle_one_request()
+        finally:
+            self.server.reaper.unwatch(self.connection)
+        if self._request_start is not None and self._status is not None:
+            self._record_request(time.perf_counter() - self._request_start)
+
+    def _send_busy(self, code, message, retry_after):
+        body = f"{message}, retry in {math.ceil(retry_after)}s\n".encode()
+        self.send_response(code)
+        self.send_header("Retry-After", str(math.ceil(retry_after)))
+        self.send_header("Content-type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_response_only(self, code, message=None):
+        self._status = code
+        super().send_response_only(code, message)
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'content-length':
+            self._response_bytes = int(value)
+        super().send_header(keyword, value)
+
+    def _record_request(self, seconds):
+        path = getattr(self, 'path', '')
+        metrics = getattr(self.server, 'metrics', None)
+        if metrics is not None:
+            metrics.observe(path, self._status, seconds)
+        access_log = getattr(self.server, 'access_log', None)
+        if access_log is not None:
+            access_log.write({
+                'ts': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='milliseconds'),
+                'client': self.client_address[0],
+                'method': getattr(self, 'command', None),
+                'path': path,
+                'status': self._status,
+                'bytes': self._response_bytes,
+                'duration_ms': round(seconds * 1000, 3),
+                'user_agent': self.headers.get('User-Agent') if self.headers else None,
+            })
+
+    def setup(self):
+        super().setup()
+        # The TLS handshake runs here, on the worker thread, not in the accept loop
+        # (bounded by the header deadline started when the connection was accepted)
+        if isinstance(self.connection, ssl.SSLSocket):
+            self.connection.do_handshake()
+
     def end_headers(self):
         # Add CORS headers for development
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        if getattr(self, '_vary_encoding', False):
+            self.send_header('Vary', 'Accept-Encoding')
+        if not self.close_connection and self.server.queue_depth():
+            # Connections are waiting for a worker: hand this one back rather than idle on keep-alive
+            self.send_header('Connection', 'close')
         super().end_headers()
 
-def create_self_signed_cert():
+    def _is_compressible(self, ctype):
+        return ctype.startswith(COMPRESSIBLE_TYPES)
+
+    def _cache_control(self, path):
+        policy = getattr(self.server, 'cache_policy', None) or DEFAULT_CACHE_POLICY
+        ext = os.path.splitext(path)[1].lower().lstrip('.')
+        return policy.get(ext, policy.get('default'))
+
+    def _send_validators(self, path, st, etag):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+        cache_control = self._cache_control(path)
+        if cache_control:
+            self.send_header("Cache-Control", cache_control)
+
+    def _not_modified(self, st, etag):
+        """If-None-Match wins over If-Modified-Since (RFC 7232 section 6)"""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            if if_none_match.strip() == '*':
+                return True
+            # Weak comparison is the rule for If-None-Match
+            tags = {t.strip().removeprefix('W/') for t in if_none_match.split(',')}
+            return etag in tags
+        if "If-Modified-Since" not in self.headers:
+            return False
+        try:
+            ims = email.utils.parsedate_to_datetime(self.headers["If-Modified-Since"])
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if ims.tzinfo is None:
+            ims = ims.replace(tzinfo=datetime.timezone.utc)
+        last_modif = datetime.datetime.fromtimestamp(st.st_mtime, datetime.timezone.utc).replace(microsecond=0)
+        return last_modif <= ims
+
+    def _if_range_matches(self, st, etag):
+        """Honour the Range header only if If-Range (when sent) still matches the file"""
+        if_range = self.headers.get("If-Range")
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"'):
+            # If-Range uses strong comparison
+            return if_range == etag
+        try:
+            date = email.utils.parsedate_to_datetime(if_range)
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        return int(date.timestamp()) == int(st.st_mtime)
+
+    def copyfile(self, source, outputfile):
+        if not isinstance(source, FileBody):
+            return super().copyfile(source, outputfile)
+        # Headers were flushed by end_headers and wfile is unbuffered, so
+        # writing straight to the socket keeps the byte order intact
+        tls = isinstance(self.connection, ssl.SSLSocket)
+        for part in source.parts:
+            if isinstance(part, bytes):
+                outputfile.write(part)
+                continue
+            offset, count = part
+            if not count:
+                continue
+            if isinstance(source.f, io.BytesIO):
+                # Hot-cache hit: getvalue() hands back the cached bytes object
+                # itself (no copy), and unlike getbuffer() it pins nothing if
+                # the client disconnects mid-write
+                outputfile.write(memoryview(source.f.getvalue())[offset:offset + count])
+            elif tls:
+                self._copy_range(source.f, offset, count, outputfile)
+            else:
+                # Plain TCP: let the kernel copy file pages straight to the socket
+                self.connection.sendfile(source.f, offset, count)
+
+    def _copy_range(self, f, offset, count, outputfile):
+        """Chunked copy through one reusable buffer (TLS has to encrypt in userspace)"""
+        buf = bytearray(min(COPY_BUFFER_SIZE, count))
+        view = memoryview(buf)
+        f.seek(offset)
+        while count > 0:
+            n = f.readinto(view[:min(count, len(buf))])
+            if not n:
+                break
+            outputfile.write(view[:n])
+            count -= n
+
+    def send_head(self):
+        """Serve a file with ETag/Cache-Control, answering conditional requests with 304.
+
+        Compressible files go through the compression cache when the client
+        accepts an encoding; each encoding is its own representation with its
+        own strong ETag.
+        """
+        path = self.translate_path(self.path)
+        hot = getattr(self.server, 'hot_cache', None)
+        entry = None
+        if hot is not None and not path.endswith('/'):
+            entry = hot.get(path)
+        if entry is None and os.path.isdir(path):
+            index = os.path.join(path, 'index.html')
+            if not self.path.split('?', 1)[0].endswith('/') or not os.path.isfile(index):
+                # Redirects and directory listings stay with SimpleHTTPRequestHandler
+                return super().send_head()
+            path = index
+            if hot is not None:
+                entry = hot.get(path)
+        if entry is not None:
+            f, st = io.BytesIO(entry.data), entry.st
+        else:
+            if path.endswith('/'):
+                self.send_error(404, "File not found")
+                return None
+            try:
+                f = open(path, 'rb')
+            except OSError:
+                self.send_error(404, "File not found")
+                return None
+        try:
+            if entry is None:
+                st = os.fstat(f.fileno())
+            ctype = self.guess_type(path)
+            cache = getattr(self.server, 'compression_cache', None)
+            encoding = None
+            if cache is not None and self._is_compressible(ctype):
+                self._vary_encoding = True
+                # Byte ranges always refer to the identity representation
+                if st.st_size >= MIN_COMPRESS_SIZE and 'Range' not in self.headers:
+                    encoding = negotiate_encoding(self.headers.get('Accept-Encoding'))
+            etag = self.server.etag_cache.etag(path, st, f)
+            if encoding:
+                etag = f'{etag[:-1]}-{encoding}"'
+            if self._not_modified(st, etag):
+                f.close()
+                self.send_response(304)
+                self._send_validators(path, st, etag)
+                self.end_headers()
+                return None
+            if encoding:
+                body = cache.get(path, st, encoding)
+                f.close()
+                self.send_response(200)
+                self.send_header("Content-type", ctype)
+                self.send_header("Content-Encoding", encoding)
+                self.send_header("Content-Length", str(len(body)))
+                self._send_validators(path, st, etag)
+                self.end_headers()
+                return io.BytesIO(body)
+            ranges = None
+            if 'Range' in self.headers and self._if_range_matches(st, etag):
+                ranges = parse_byte_ranges(self.headers['Range'], st.st_size)
+            if ranges == []:
+                f.close()
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{st.st_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+            if not ranges:
+                body = FileBody(f, [(0, st.st_size)])
+                self.send_response(200)
+                self.send_header("Content-type", ctype)
+            elif len(ranges) == 1:
+                start, end = ranges[0]
+                body = FileBody(f, [(start, end - start + 1)])
+                self.send_response(206)
+                self.send_header("Content-type", ctype)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{st.st_size}")
+            else:
+                boundary = uuid.uuid4().hex
+                parts = []
+                for start, end in ranges:
+                    parts.append((f"\r\n--{boundary}\r\nContent-Type: {ctype}\r\n"
+                                  f"Content-Range: bytes {start}-{end}/{st.st_size}\r\n\r\n").encode('latin-1'))
+                    parts.append((start, end - start + 1))
+                parts.append(f"\r\n--{boundary}--\r\n".encode('latin-1'))
+                body = FileBody(f, parts)
+                self.send_response(206)
+                self.send_header("Content-type", f"multipart/byteranges; boundary={boundary}")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Accept-Ranges", "bytes")
+            self._send_validators(path, st, etag)
+            self.end_headers()
+            return body
+        except:
+            f.close()
+            raise
+
+    def do_GET(self):
+        api = getattr(self.server, 'api', None)
+        if api is not None and self.path.startswith('/api/') and api.handle(self):
+            return
+        hot = getattr(self.server, 'hot_cache', None)
+        if hot is not None and self.path == '/__cache-stats':
+            self._send_generated(json.dumps(hot.stats(), indent=2).encode(), "application/json")
+            return
+        if self.path == '/__metrics' and getattr(self.server, 'metrics', None) is not None:
+            body = self.server.render_metrics()
+            self._send_generated(body.encode(), "text/plain; version=0.0.4; charset=utf-8")
+            return
+        if self._pdf_route():
+            return
+        super().do_GET()
+
+    def do_HEAD(self):
+        if self._pdf_route():
+            return
+        super().do_HEAD()
+
+    def _pdf_route(self):
+        renderer = getattr(self.server, 'pdf_renderer', None)
+        if renderer is None or not self.path.startswith('/__pdf/'):
+            return False
+        self.send_rendered_pdf(renderer, urllib.parse.urlsplit(self.path).path[len('/__pdf/'):])
+        return True
+
+    def do_POST(self):
+        api = getattr(self.server, 'api', None)
+        if api is None or not api.handle(self):
+            self.send_error(501, "Unsupported method ('POST')")
+
+    do_PUT = do_POST
+
+    def read_json_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        return json.loads(raw) if raw.strip() else {}
+
+    def send_json(self, status, payload):
+        if not isinstance(payload, (bytes, bytearray)):
+            payload = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self._send_generated(payload, 'application/json', status)
+
+    def send_pdf(self, path):
+        with open(path, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-type", "application/pdf")
+        self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(path)}"')
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_rendered_pdf(self, renderer, name):
+        """GET /__pdf/<document>.pdf: the cached render, rebuilt first if any input changed"""
+        name = name.removesuffix('.pdf')
+        if name == '':
+            self.send_json(200, renderer.stats())
+            return
+        if name not in renderer.documents:
+            self.send_error(404, f"Unknown document (available: {', '.join(sorted(renderer.documents))})")
+            return
+        f, etag, error = renderer.render(name)
+        if f is None:
+            self.send_error(503, "PDF render failed", error)
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            if self._not_modified(st, etag):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-type", "application/pdf")
+            self.send_header("Content-Disposition", f'inline; filename="{renderer.documents[name]["filename"]}"')
+            self.send_header("Content-Length", str(st.st_size))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+            # Always revalidate: the ETag changes as soon as an input does
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.copyfile(FileBody(f, [(0, st.st_size)]), self.wfile)
+
+    def _send_generated(self, body, ctype, status=200):
+        self.send_response(status)
+        self.send_header("Content-type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_OPTIONS(self):
+        """Answer CORS preflight requests without closing the connection"""
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+class ThreadPoolHTTPServer(http.server.HTTPServer):
+    """HTTPServer that hands each accepted connection to a fixed-size thread pool"""
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, max_workers=DEFAULT_WORKERS, compression_cache=None,
+                 cache_policy=None, hot_cache=None, metrics=None, access_log=None, reuse_port=False,
+                 metrics_dir=None, api=None, max_queue=MAX_QUEUE, max_connections=None, rate_limiter=None,
+                 header_timeout=HEADER_TIMEOUT, retry_after=RETRY_AFTER_S, pdf_renderer=None):
+        self.reuse_port = reuse_port
+        super().__init__(server_address, handler_class)
+        self.max_workers = max_workers
+        self.compression_cache = compression_cache
+        self.hot_cache = hot_cache
+        self.metrics = metrics
+        self.access_log = access_log
+        self.api = api
+        self.pdf_renderer = pdf_renderer
+        self.cache_policy = cache_policy or DEFAULT_CACHE_POLICY
+        self.etag_cache = ETagCache()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='https-worker')
+        # Admission control: bounded wait queue and total, excess answered by a small side pool
+        self.max_queue = max_queue
+        self.max_connections = max_connections or max_workers + max_queue
+        self.rate_limiter = rate_limiter
+        self.header_timeout = header_timeout
+        self.reaper = DeadlineReaper()
+        self.shed_connections = 0
+        self._queued = 0
+        self._active = 0
+        self._shedding = 0
+        self._load_lock = threading.Lock()
+        self._shed_pool = ThreadPoolExecutor(max_workers=SHED_WORKERS, thread_name_prefix='https-shed')
+        body = b"Server busy, retry shortly\n"
+        self._busy_response = (
+            f"HTTP/1.1 503 Service Unavailable\r\nRetry-After: {math.ceil(retry_after)}\r\n"
+            f"Content-Type: text/plain\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+        ).encode('latin-1') + body
+        # Prefork: each process drops its snapshot here; /__metrics in any worker sums them
+        self.metrics_dir = metrics_dir
+        self._metrics_stop = threading.Event()
+        if metrics_dir and metrics is not None:
+            threading.Thread(target=self._flush_metrics_loop, name='metrics-flush', daemon=True).start()
+
+    def server_bind(self):
+        if self.reuse_port:
+            # Every prefork worker binds its own listening socket; the kernel spreads connections
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def metrics_snapshot(self):
+        return {'pid': os.getpid(), 'requests': self.metrics.snapshot(), 'counters': self.extra_metrics()}
+
+    def write_metrics_file(self):
+        path = os.path.join(self.metrics_dir, f"{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as out:
+            json.dump(self.metrics_snapshot(), out)
+        os.replace(tmp, path)
+
+    def _flush_metrics_loop(self):
+        while not self._metrics_stop.wait(METRICS_FLUSH_S):
+            try:
+                self.write_metrics_file()
+            except OSError:
+                pass
+
+    def render_metrics(self):
+        """Prometheus text for /__metrics; summed across processes in prefork mode"""
+        if not self.metrics_dir:
+            return render_prometheus(self.metrics.snapshot(), self.extra_metrics())
+        self.write_metrics_file()
+        snapshots = []
+        live = 0
+        for entry in os.scandir(self.metrics_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                with open(entry.path, encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            # Retired workers' files are kept so counters never go backwards
+            snapshots.append(snapshot)
+            try:
+                os.kill(snapshot['pid'], 0)
+                live += 1
+            except OSError:
+                pass
+        merged = merge_metric_snapshots(snapshots)
+        merged['counters']['https_worker_processes'] = ('Worker processes currently serving.', live)
+        return render_prometheus(merged['requests'], merged['counters'])
+
+    def drain(self, timeout=GRACEFUL_TIMEOUT):
+        """Stop accepting and give in-flight connections up to timeout seconds to finish"""
+        # close() would reset connections the kernel already queued on this
+        # socket, so take them until the backlog stays empty (bounded: with
+        # SO_REUSEPORT the kernel keeps routing some new connections here
+        # until the socket is closed)
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline and select.select([self.socket], [], [], 0.05)[0]:
+            self._handle_request_noblock()
+        self.socket.close()
+        waiter = threading.Thread(target=self._pool.shutdown, kwargs={'wait': True}, daemon=True)
+        waiter.start()
+        waiter.join(timeout)
+
+    def extra_metrics(self):
+        """Cache and load counters exported next to the latency histograms on /__metrics"""
+        extra = {}
+        if self.hot_cache is not None:
+            stats = self.hot_cache.stats()
+            extra['https_hot_cache_hits_total'] = ('Hot-file cache hits.', stats['hits'])
+            extra['https_hot_cache_misses_total'] = ('Hot-file cache misses (file read from disk).', stats['misses'])
+            extra['https_hot_cache_evictions_total'] = ('Hot-file cache LRU evictions.', stats['evictions'])
+            extra['https_hot_cache_bytes'] = ('Bytes held by the hot-file cache.', stats['bytes'])
+        extra['https_connections_active'] = ('Connections being served by a worker thread.', self._active)
+        extra['https_connections_queued'] = ('Accepted connections waiting for a worker thread.', self._queued)
+        extra['https_shed_connections_total'] = ('Connections refused with 503 because the server was full.',
+                                                 self.shed_connections)
+        extra['https_header_timeouts_total'] = ('Connections closed for a slow handshake or request headers.',
+                                                self.reaper.reaped)
+        if self.rate_limiter is not None:
+            extra['https_rate_limited_total'] = ('Requests answered 429 by the per-client rate limit.',
+                                                 self.rate_limiter.limited)
+        if self.access_log is not None:
+            extra['https_access_log_dropped_total'] = ('Access-log records dropped because the queue was full.',
+                                                       self.access_log.dropped)
+        return extra
+
+    def queue_depth(self):
+        return self._queued
+
+    def process_request(self, request, client_address):
+        with self._load_lock:
+            admit = self._queued < self.max_queue and self._queued + self._active < self.max_connections
+            if admit:
+                self._queued += 1
+            else:
+                self.shed_connections += 1
+                reply = self._shedding < SHED_MAX_INFLIGHT
+                if reply:
+                    self._shedding += 1
+        if admit:
+            # Time spent queued counts against the handshake/header deadline
+            self.reaper.watch(request, self.header_timeout)
+            self._pool.submit(self._process_request_worker, request, client_address)
+        elif reply:
+            self._shed_pool.submit(self._send_busy, request)
+        else:
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        with self._load_lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._load_lock:
+                self._active -= 1
+            self.reaper.unwatch(request)
+            self.shutdown_request(request)
+
+    def _send_busy(self, request):
+        """Fast 503 for a connection the server has no room for"""
+        try:
+            request.settimeout(SHED_TIMEOUT)
+            if isinstance(request, ssl.SSLSocket):
+                request.do_handshake()
+            try:
+                # Read the request first: closing with unread data would reset the reply away
+                request.recv(65536)
+            except OSError:
+                pass
+            request.sendall(self._busy_response)
+        except OSError:
+            pass
+        finally:
+            with self._load_lock:
+                self._shedding -= 1
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._shed_pool.shutdown(wait=False, cancel_futures=True)
+        self.reaper.close()
+        if self.metrics_dir and self.metrics is not None:
+            self._metrics_stop.set()
+            try:
+                self.write_metrics_file()
+            except OSError:
+                pass
+        if self.access_log is not None:
+            self.access_log.close()
+        if self.api is not None:
+            self.api.close()
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections or failing the handshake are routine
+        exc = sys.exc_info()[1]
+        if isinstance(exc, (ConnectionError, ssl.SSLError, TimeoutError)):
+            return
+        super().handle_error(request, client_address)
+
+def create_self_signed_cert(key_type=DEFAULT_CERT_KEY):
     """Create a self-signed certificate for HTTPS testing"""
+    certfile, keyfile = CERT_FILES[key_type]
     try:
         import subprocess
-        
+
         # Check if cert already exists
-        if os.path.exists('server.crt') and os.path.exists('server.key'):
-            print("✅ Certificate files already exist")
+        if os.path.exists(certfile) and os.path.exists(keyfile):
+            print(f"✅ Certificate files already exist ({certfile})")
             return True
-            
+
         # Create self-signed certificate
-        print("🔐 Creating self-signed certificate for HTTPS testing...")
+        print(f"🔐 Creating self-signed {key_type} certificate for HTTPS testing...")
         subprocess.run([
-            'openssl', 'req', '-x509', '-newkey', 'rsa:4096', '-keyout', 'server.key',
-            '-out', 'server.crt', '-days', '365', '-nodes', '-subj',
+            'openssl', 'req', '-x509', *CERT_KEY_ARGS[key_type], '-keyout', keyfile,
+            '-out', certfile, '-days', '365', '-nodes', '-subj',
             '/C=US/ST=GA/L=Atlanta/O=CochranFilms/CN=localhost'
         ], check=True, capture_output=True)
-        
+
         print("✅ Certificate created successfully")
         return True
     except (subprocess.CalledProcessError, FileNotFoundError):
@@ -45,37 +1846,393 @@ def create_self_signed_cert():
         print("💡 On macOS, install with: brew install openssl")
         return False
 
-def start_https_server():
-    """Start HTTPS server"""
+def create_server_context(key_type=DEFAULT_CERT_KEY, session_tickets=True):
+    """SSLContext tuned for cheap handshakes.
+
+    TLS 1.2+ only, ECDHE with AEAD ciphers for TLS 1.2 (TLS 1.3 suites are
+    OpenSSL's defaults), and resumption via session tickets plus the
+    context's server-side session cache, which all worker threads share.
+    """
+    certfile, keyfile = CERT_FILES[key_type]
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.set_ciphers(TLS12_CIPHERS)
+    context.options |= ssl.OP_CIPHER_SERVER_PREFERENCE
+    if session_tickets:
+        context.num_tickets = 2
+    else:
+        # TLS 1.2 clients can still resume through the session-ID cache (TLS 1.3 needs tickets)
+        context.options |= ssl.OP_NO_TICKET
+        context.num_tickets = 0
+    context.load_cert_chain(certfile, keyfile)
+    return context
+
+def benchmark_handshakes(count, key_type=DEFAULT_CERT_KEY, session_tickets=True):
+    """Time full vs resumed TLS handshakes against an in-process server on a loopback port"""
+    if not create_self_signed_cert(key_type):
+        return False
+    context = create_server_context(key_type, session_tickets)
+    class QuietHandler(HTTPSHandler):
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadPoolHTTPServer(("127.0.0.1", 0), QuietHandler, max_workers=4)
+    httpd.socket = context.wrap_socket(httpd.socket, server_side=True, do_handshake_on_connect=False)
+    port = httpd.server_address[1]
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    client = ssl.create_default_context()
+    client.check_hostname = False
+    client.verify_mode = ssl.CERT_NONE
+
+    def handshake(session=None, exchange=False):
+        with socket.create_connection(("127.0.0.1", port)) as raw:
+            with client.wrap_socket(raw, server_hostname="localhost", session=session) as conn:
+                version, cipher = conn.version(), conn.cipher()[0]
+                if exchange:
+                    # TLS 1.3 tickets arrive after the handshake, so read a response to collect one
+                    conn.sendall(b"OPTIONS * HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+                    while conn.recv(4096):
+                        pass
+                return conn.session, conn.session_reused, version, cipher
+
+    try:
+        session, _, version, cipher = handshake(exchange=True)
+        print(f"🔐 {key_type} certificate, {version}, {cipher}, session tickets {'on' if session_tickets else 'off'}")
+
+        start = time.perf_counter()
+        for _ in range(count):
+            handshake()
+        full_rate = count / (time.perf_counter() - start)
+
+        reused = 0
+        start = time.perf_counter()
+        for _ in range(count):
+            _, was_reused, _, _ = handshake(session)
+            reused += was_reused
+        resumed_rate = count / (time.perf_counter() - start)
+
+        print(f"⏱️  Full handshakes:    {full_rate:8.1f}/s")
+        print(f"⏱️  Resumed handshakes: {resumed_rate:8.1f}/s ({reused}/{count} actually resumed)")
+        print(f"📈 Resumption speed-up: {resumed_rate / full_rate:.1f}x")
+        return True
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+def build_server(port, workers, context=None, compression_cache=None, cache_policy=None, hot_cache=None,
+                 access_log_path=None, reuse_port=False, metrics_dir=None, api=None, limits=None,
+                 pdf_renderer=None):
+    """ThreadPoolHTTPServer listening on port, TLS-wrapped when an SSLContext is given.
+
+    limits holds the admission-control keywords of ThreadPoolHTTPServer
+    (max_queue, max_connections, rate_limiter, header_timeout, retry_after).
+    """
+    httpd = ThreadPoolHTTPServer(("", port), HTTPSHandler, max_workers=workers, compression_cache=compression_cache,
+                                 cache_policy=cache_policy, hot_cache=hot_cache, metrics=RequestMetrics(),
+                                 access_log=AccessLog(access_log_path) if access_log_path else None,
+                                 reuse_port=reuse_port, metrics_dir=metrics_dir, api=api,
+                                 pdf_renderer=pdf_renderer, **(limits or {}))
+    if context is not None:
+        # Add SSL; handshakes are deferred to the worker threads (see HTTPSHandler.setup)
+        httpd.socket = context.wrap_socket(httpd.socket, server_side=True, do_handshake_on_connect=False)
+    return httpd
+
+def run_worker(make_server):
+    """Body of a prefork child: serve until SIGTERM, then drain and exit"""
+    # Ctrl+C reaches the whole process group; the parent turns it into SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    status = 0
+    httpd = None
+    try:
+        httpd = make_server()
+
+        def on_term(signum, frame):
+            # shutdown() blocks until serve_forever returns, so it can't run on this thread
+            threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, on_term)
+        httpd.serve_forever()
+        httpd.drain()
+    except Exception as e:
+        print(f"❌ Worker {os.getpid()} failed: {e}")
+        status = 1
+    finally:
+        if httpd is not None:
+            httpd.server_close()
+        sys.stdout.flush()
+        os._exit(status)
+
+def serve_prefork(processes, make_context, make_server):
+    """Supervise `processes` forked workers that share the port via SO_REUSEPORT.
+
+    SIGHUP is a graceful restart: certificates are reloaded, a new set of
+    workers starts listening, then the old set drains and exits. Workers
+    that die are replaced; Ctrl+C / SIGTERM stops everything.
+    """
+    workers = {}      # pid -> start time
+    retiring = set()
+    reload_requested = threading.Event()
+    fast_failures = 0
+
+    def spawn(context):
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid == 0:
+            run_worker(lambda: make_server(context))
+        workers[pid] = time.monotonic()
+
+    def stop_all():
+        for pid in list(workers) + list(retiring):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT + 5
+        while (workers or retiring) and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                workers.pop(pid, None)
+                retiring.discard(pid)
+            else:
+                time.sleep(0.1)
+        for pid in list(workers) + list(retiring):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def on_term(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGHUP, lambda signum, frame: reload_requested.set())
+    signal.signal(signal.SIGTERM, on_term)
+
+    context = make_context()
+    for _ in range(processes):
+        spawn(context)
+    try:
+        while True:
+            if reload_requested.is_set():
+                reload_requested.clear()
+                print("🔄 SIGHUP: starting new workers, draining the old ones")
+                context = make_context()
+                old = set(workers)
+                for _ in range(processes):
+                    spawn(context)
+                for pid in old:
+                    workers.pop(pid, None)
+                    retiring.add(pid)
+                    try:
+                        os.kill(pid, signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if not pid:
+                time.sleep(0.2)
+                continue
+            if pid in retiring:
+                retiring.discard(pid)
+                continue
+            started = workers.pop(pid, None)
+            if started is None:
+                continue
+            print(f"⚠️  Worker {pid} exited ({status}), starting a replacement")
+            fast_failures = fast_failures + 1 if time.monotonic() - started < 2 else 0
+            if fast_failures > 5:
+                print("❌ Workers keep failing at startup (is the port in use?), giving up")
+                return
+            spawn(context)
+    finally:
+        stop_all()
+
+def start_https_server(port=PORT, workers=DEFAULT_WORKERS, keepalive=KEEPALIVE_TIMEOUT, compression_cache=None,
+                       cache_policy=None, tls=True, hot_cache=None, key_type=DEFAULT_CERT_KEY,
+                       session_tickets=True, access_log_path=None, processes=1, api=None, limits=None,
+                       pdf_renderer=None):
+    """Start HTTPS server (or plain HTTP with tls=False, e.g. behind a TLS-terminating proxy)"""
+    httpd = None
+    metrics_dir = None
     try:
         # Create certificate if needed
-        if not create_self_signed_cert():
+        if tls and not create_self_signed_cert(key_type):
             print("❌ Cannot start HTTPS server without certificate")
             return False
-        
+
         # Start server
-        handler = HTTPSHandler
-        httpd = socketserver.TCPServer(("", PORT), handler)
-        
-        # Add SSL
-        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
-        context.load_cert_chain('server.crt', 'server.key')
-        httpd.socket = context.wrap_socket(httpd.socket, server_side=True)
-        
-        print(f"🚀 HTTPS Server running on https://localhost:{PORT}")
-        print("🔐 You'll see a 'Not Secure' warning - click 'Advanced' → 'Continue to localhost'")
-        print("📝 This is normal for self-signed certificates in development")
+        HTTPSHandler.timeout = keepalive
+
+        def make_context():
+            # Loaded once per generation in the parent, so prefork workers share it
+            # (and its session-ticket keys: a ticket from one worker resumes on any)
+            return create_server_context(key_type, session_tickets) if tls else None
+
+        def make_server(context, reuse_port=False):
+            return build_server(port, workers, context, compression_cache=compression_cache,
+                                cache_policy=cache_policy, hot_cache=hot_cache, access_log_path=access_log_path,
+                                reuse_port=reuse_port, metrics_dir=metrics_dir, api=api, limits=limits,
+                                pdf_renderer=pdf_renderer)
+
+        if processes <= 1:
+            httpd = make_server(make_context())
+
+        scheme = 'https' if tls else 'http'
+        if tls:
+            print(f"🚀 HTTPS Server running on https://localhost:{port} ({key_type} certificate)")
+        else:
+            print(f"🚀 HTTP Server running on http://localhost:{port} (files sent with sendfile)")
+        if processes > 1:
+            print(f"🧵 {processes} processes x {workers} worker threads (SO_REUSEPORT), "
+                  f"HTTP/1.1 keep-alive ({keepalive}s idle timeout)")
+            print(f"🔄 kill -HUP {os.getpid()} for a graceful restart")
+        else:
+            print(f"🧵 {workers} worker threads, HTTP/1.1 keep-alive ({keepalive}s idle timeout)")
+        limits = limits or {}
+        max_queue = limits.get('max_queue', MAX_QUEUE)
+        print(f"🚦 Up to {limits.get('max_connections') or workers + max_queue} connections, {max_queue} queued; "
+              f"beyond that 503 + Retry-After. Headers must arrive within "
+              f"{limits.get('header_timeout', HEADER_TIMEOUT)}s")
+        if limits.get('rate_limiter'):
+            limiter = limits['rate_limiter']
+            print(f"🚦 Rate limit: {limiter.rate:g} requests/s per client (burst {limiter.burst:g}), then 429")
+        if compression_cache:
+            encodings = 'br, gzip' if brotli else 'gzip'
+            print(f"🗜️  Compressing text assets ({encodings}), cache in {compression_cache.cache_dir}/")
+        if hot_cache:
+            print(f"🔥 Hot-file cache: {hot_cache.max_bytes >> 20} MB, revalidated every {hot_cache.revalidate_s}s "
+                  f"(stats at /__cache-stats)")
+        if api:
+            print(f"🧪 API emulator: /api/users, /api/update-users, /api/jobs-data, /api/notifications, "
+                  f"/api/contracts from {os.path.abspath(api.data_dir)}")
+        if pdf_renderer:
+            docs = ', '.join(f"/__pdf/{name}.pdf" for name in sorted(pdf_renderer.documents))
+            print(f"📄 PDFs rendered on demand and cached until an input changes: {docs}")
+        print(f"📊 Latency metrics at {scheme}://localhost:{port}/__metrics")
+        if access_log_path:
+            print(f"📝 JSON access log: {access_log_path}")
+        if tls:
+            print("🔐 You'll see a 'Not Secure' warning - click 'Advanced' → 'Continue to localhost'")
+            print("📝 This is normal for self-signed certificates in development")
         print("⏹️  Press Ctrl+C to stop the server")
         print()
-        print(f"🌐 Open: https://localhost:{PORT}/admin-dashboard.html")
+        print(f"🌐 Open: {scheme}://localhost:{port}/admin-dashboard.html")
         print()
-        
-        httpd.serve_forever()
-        
+
+        if processes > 1:
+            metrics_dir = tempfile.mkdtemp(prefix='https-metrics-')
+            serve_prefork(processes, make_context, lambda context: make_server(context, reuse_port=True))
+        else:
+            httpd.serve_forever()
+
     except KeyboardInterrupt:
         print("\n🛑 Server stopped")
+        if hot_cache and processes <= 1:
+            stats = hot_cache.stats()
+            print(f"🔥 Hot-file cache: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['revalidations']} revalidations, {stats['evictions']} evictions")
     except Exception as e:
         print(f"❌ Server error: {e}")
+    finally:
+        if httpd is not None:
+            httpd.server_close()
+        if metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTPS server for the Cochran Films pages")
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='maximum concurrently served connections (thread pool size)')
+    parser.add_argument('--keepalive', type=float, default=KEEPALIVE_TIMEOUT,
+                        help='seconds an idle keep-alive connection is held open')
+    parser.add_argument('--no-compress', action='store_true', help='serve text assets uncompressed')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='on-disk cache for compressed assets')
+    parser.add_argument('--cache-memory-mb', type=int, default=CACHE_MEMORY_MB)
+    parser.add_argument('--cache-disk-mb', type=int, default=CACHE_DISK_MB)
+    parser.add_argument('--cache-control', action='append', default=[], metavar='EXT=VALUE',
+                        help="override Cache-Control for an extension, e.g. png='public, max-age=60' or default=no-store")
+    parser.add_argument('--hot-cache-mb', type=int, default=HOT_CACHE_MB,
+                        help='in-memory cache for small, frequently served files (0 disables)')
+    parser.add_argument('--hot-revalidate', type=float, default=HOT_REVALIDATE_S,
+                        help='seconds a hot-cached file is served before it is re-stat\'ed')
+    parser.add_argument('--cert-key', choices=sorted(CERT_FILES), default=DEFAULT_CERT_KEY,
+                        help='key type of the self-signed certificate (rsa4096 reuses server.crt/server.key)')
+    parser.add_argument('--no-session-tickets', action='store_true',
+                        help='disable TLS session tickets (session-ID resumption still works for TLS 1.2)')
+    parser.add_argument('--bench-handshakes', type=int, metavar='N', default=0,
+                        help='measure N full and N resumed handshakes per second, then exit')
+    parser.add_argument('--access-log', metavar='PATH',
+                        help='append a JSON line per request to PATH (written by a background thread)')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='prefork this many worker processes sharing the port via SO_REUSEPORT '
+                             '(load-balanced on Linux; SIGHUP restarts them gracefully)')
+    parser.add_argument('--api', action='store_true',
+                        help='emulate the api/ functions locally from users.json, job-data.json, '
+                             'notifications.json and uploaded-contracts.json')
+    parser.add_argument('--api-data-dir', default='.', help='directory holding the emulator\'s JSON files')
+    parser.add_argument('--render-pdf', action='store_true',
+                        help='serve /__pdf/<document>.pdf, built by linked_pdf_converter.py with headless Chrome')
+    parser.add_argument('--max-queue', type=int, default=MAX_QUEUE,
+                        help='accepted connections allowed to wait for a worker; more get an immediate 503')
+    parser.add_argument('--max-connections', type=int, default=None,
+                        help='connections held per process, served + waiting (default: workers + max-queue)')
+    parser.add_argument('--rate-limit', type=float, default=0,
+                        help='requests/second allowed per client address, 0 = unlimited (per process)')
+    parser.add_argument('--rate-burst', type=float, default=None, help='token-bucket burst (default: 2x rate)')
+    parser.add_argument('--header-timeout', type=float, default=HEADER_TIMEOUT,
+                        help='seconds allowed for the TLS handshake and for each request line + headers')
+    parser.add_argument('--retry-after', type=int, default=RETRY_AFTER_S, help='Retry-After seconds on 503s')
+    parser.add_argument('--plain-http', action='store_true',
+                        help='serve without TLS (behind a TLS-terminating proxy); enables zero-copy sendfile')
+    return parser.parse_args(argv)
+
+def parse_cache_policy(overrides):
+    policy = dict(DEFAULT_CACHE_POLICY)
+    for item in overrides:
+        ext, sep, value = item.partition('=')
+        if not sep:
+            raise SystemExit(f"--cache-control expects EXT=VALUE, got {item!r}")
+        policy[ext.strip().lower().lstrip('.')] = value.strip()
+    return policy
 
 if __name__ == "__main__":
-    start_https_server()
\ No newline at end of file
+    args = parse_args()
+    if args.bench_handshakes:
+        ok = benchmark_handshakes(args.bench_handshakes, args.cert_key, not args.no_session_tickets)
+        sys.exit(0 if ok else 1)
+    cache = None
+    if not args.no_compress:
+        cache = CompressionCache(args.cache_dir, args.cache_memory_mb << 20, args.cache_disk_mb << 20)
+    api = None
+    if args.api:
+        if args.processes > 1:
+            # Each process would hold its own copy of the data and overwrite the others' writes
+            sys.exit("❌ --api keeps its state in memory; run it with --processes 1")
+        api = ApiEmulator(args.api_data_dir)
+    pdf_renderer = None
+    if args.render_pdf:
+        pdf_renderer = PdfRenderer.load('.', args.cache_dir)
+        if pdf_renderer is None:
+            sys.exit("❌ --render-pdf needs linked_pdf_converter.py in the served directory")
+    hot_cache = None
+    if args.hot_cache_mb > 0:
+        hot_cache = HotFileCache(args.hot_cache_mb << 20, args.hot_revalidate)
+    start_https_server(port=args.port, workers=args.workers, keepalive=args.keepalive, compression_cache=cache,
+                       cache_policy=parse_cache_policy(args.cache_control), tls=not args.plain_http,
+                       hot_cache=hot_cache, key_type=args.cert_key,
+                       session_tickets=not args.no_session_tickets, access_log_path=args.access_log,
+                       processes=args.processes, api=api, pdf_renderer=pdf_renderer, limits={
+                           'max_queue': args.max_queue,
+                           'max_connections': args.max_connections,
+                           'rate_limiter': RateLimiter(args.rate_limit, args.rate_burst or 2 * args.rate_limit)
+                           if args.rate_limit > 0 else None,
+                           'header_timeout': args.header_timeout,
+                           'retry_after': args.retry_after,
+                       })
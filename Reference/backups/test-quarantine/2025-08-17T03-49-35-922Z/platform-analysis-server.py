@@ -14,25 +14,808 @@ Features:
 - Performance optimization suggestions
 - Security review
 - User workflow analysis
+- Tree-wide analysis of every page and module (--tree, /api/analysis/tree),
+  honoring .gitignore and spread across all cores
+- Results held in memory and refreshed in the background on file changes
+  (/api/analysis/status)
+- Per-element HTML findings with line numbers: images without alt, unlabeled
+  form fields, inline script/style and data: URL sizes
 """
 
 import os
+import sys
+import argparse
+import hashlib
 import json
 import re
 import html
+from html.parser import HTMLParser
+import tempfile
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 import http.server
 import socketserver
 import urllib.parse
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional, Iterable, Iterator, TextIO
+
+# Substrings the HTML/JS/CSS structure checks look for. Like the `in` and
+# count() checks they replace, these are case-sensitive.
+STRUCTURE_LITERALS = (
+    '<header', '<nav', '<main', '<section', '<article', '<aside', '<footer',
+    'aria-label', 'aria-labelledby', '<script>', '<style>',
+    'const ', 'let ', 'async ', 'await ', 'addEventListener', 'removeEventListener', 'try {', 'catch',
+    '@media', 'var(--', 'display: flex', 'display: grid',
+)
+
+# The only characters re.IGNORECASE matches against an ASCII letter that
+# str.lower() does not turn into it ('İ' would also lower() to two characters)
+_CASE_FOLD = str.maketrans({'\u0130': 'i', '\u0131': 'i', '\u017f': 's'})
+
+# Files are scanned SCAN_CHUNK characters at a time, carrying the last
+# SCAN_OVERLAP characters of each window into the next so that any match up
+# to that long is seen whole wherever the chunk boundaries fall
+SCAN_CHUNK = 1 << 20
+SCAN_OVERLAP = 1 << 16
+# Locations kept per pattern; counts are always exact
+MAX_LOCATIONS = 10_000
+_QUANTIFIERS = ('*', '+', '?', '{')
+
+def _top_level_split(pattern: str) -> List[str]:
+    """Split a regex on the '|' that are not inside a group or character class"""
+    parts, depth, start, i = [], 0, 0, 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == '[':
+            i = _class_end(pattern, i)
+            if i < 0:
+                return [pattern]
+            continue
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == '|' and depth == 0:
+            parts.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+def _class_end(pattern: str, i: int) -> int:
+    """Index just past the character class opening at pattern[i], or -1"""
+    j = i + 1
+    if pattern[j:j + 1] == '^':
+        j += 1
+    if pattern[j:j + 1] == ']':
+        j += 1
+    while j < len(pattern):
+        if pattern[j] == '\\':
+            j += 2
+        elif pattern[j] == ']':
+            return j + 1
+        else:
+            j += 1
+    return -1
+
+def _group_end(pattern: str, i: int) -> int:
+    """Index just past the group opening at pattern[i], or -1"""
+    depth, j = 0, i
+    while j < len(pattern):
+        ch = pattern[j]
+        if ch == '\\':
+            j += 2
+            continue
+        if ch == '[':
+            j = _class_end(pattern, j)
+            if j < 0:
+                return -1
+            continue
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+            if depth == 0:
+                return j + 1
+        j += 1
+    return -1
+
+def split_first_char(pattern: str) -> Any:
+    """Rewrite a regex as [(first character, rest of the regex), ...] in match order.
+
+    Only handles patterns that start with a literal, an escaped symbol, a plain
+    character class or an (alternation) group of those; anything else returns
+    None and is scanned on its own.
+    """
+    alternatives = _top_level_split(pattern)
+    if len(alternatives) > 1:
+        branches = []
+        for alternative in alternatives:
+            split = split_first_char(alternative)
+            if split is None:
+                return None
+            branches.extend(split)
+        return branches
+    if not pattern:
+        return None
+    if pattern[0] == '(':
+        end = _group_end(pattern, 0)
+        if end < 0:
+            return None
+        inner, tail = pattern[1:end - 1], pattern[end:]
+        if tail.startswith(_QUANTIFIERS):
+            return None
+        if inner.startswith('?'):
+            if not inner.startswith('?:'):
+                return None  # lookaround, named group or inline flags
+            inner = inner[2:]
+        split = split_first_char(inner)
+        if split is None:
+            return None
+        return [(first, f'(?:{rest}){tail}') for first, rest in split]
+    if pattern[0] == '[':
+        end = _class_end(pattern, 0)
+        if end < 0 or pattern.startswith('[^'):
+            return None
+        chars, tail = re.sub(r'\\(\W)', r'\1', pattern[1:end - 1]), pattern[end:]
+        if '\\' in chars or '-' in chars.strip('-'):
+            return None  # class escapes and ranges
+        firsts = list(dict.fromkeys(chars))
+    elif pattern[0] == '\\':
+        if len(pattern) < 2 or pattern[1].isalnum():
+            return None  # \s, \d, \b, backreferences...
+        firsts, tail = [pattern[1]], pattern[2:]
+    elif pattern[0] in '.^$*+?{}[]|()':
+        return None
+    else:
+        firsts, tail = [pattern[0]], pattern[1:]
+    if tail.startswith(_QUANTIFIERS) or not all(ch.isascii() for ch in firsts):
+        return None
+    return [(first.lower(), tail) for first in firsts]
+
+class ScanResult:
+    """Matches of one PatternScanner pass: name -> [(offset, line, column), ...]
+
+    Location lists stop at max_locations; counts covers every match.
+    """
+
+    def __init__(self, matches: Dict[str, List[Tuple[int, int, int]]], literals: Dict[str, List[Tuple[int, int, int]]],
+                 counts: Dict[str, int]):
+        self.matches = matches
+        self.literals = literals
+        self.counts = counts
+
+    def count(self, name: str) -> int:
+        return self.counts[name]
+
+    def found(self, name: str) -> bool:
+        return self.counts[name] > 0
+
+    def locations(self, name: str) -> List[Dict[str, int]]:
+        return [{'line': line, 'column': column} for _, line, column in self.matches[name]]
+
+class PatternScanner:
+    """Finds case-insensitive regexes and case-sensitive literals in one pass.
+
+    Everything is compiled into a single alternation dispatched on the first
+    character, with a named group per pattern capturing each match's full
+    extent. The text is lowercased once so the engine can skip straight to
+    candidate characters (IGNORECASE would disable that). Counts are kept per
+    name without overlap, matching re.findall(pattern, text, re.IGNORECASE)
+    and str.count(literal) run one at a time.
+    """
+
+    def __init__(self, patterns: Dict[str, str], literals=()):
+        self.patterns = dict(patterns)
+        self.literals = tuple(dict.fromkeys(literals))
+        self.fallback = {}
+        by_first = {}
+        for name, pattern in self.patterns.items():
+            split = None if re.search(r'\\\d|\(\?P=', pattern) else split_first_char(pattern)
+            if split is None:
+                self.fallback[name] = re.compile(pattern, re.IGNORECASE)
+                continue
+            rests = {}
+            for first, rest in split:
+                rests.setdefault(first, []).append(rest)
+            for first, rest in rests.items():
+                by_first.setdefault(first, []).append((name, None, '|'.join(f'(?:{r})' for r in rest)))
+        for literal in self.literals:
+            by_first.setdefault(literal[0].lower(), []).append((literal, literal, re.escape(literal[1:].lower())))
+
+        alternatives = []
+        self._groups = {}
+        for first, entries in by_first.items():
+            guard = '|'.join(f'(?:{rest})' for _, _, rest in entries)
+            captures = []
+            groups = self._groups[first] = []
+            for name, literal, rest in entries:
+                group = f'g{sum(map(len, self._groups.values()))}'
+                groups.append((group, name, literal))
+                captures.append(f'(?=(?P<{group}>(?i:{rest}))|)')
+            alternatives.append(f'{re.escape(first)}(?=(?i:{guard})){"".join(captures)}')
+        self._regex = re.compile('|'.join(alternatives)) if alternatives else None
+
+    def scan(self, text: str) -> ScanResult:
+        return self.scan_stream([text])
+
+    def scan_stream(self, chunks: Iterable[str], overlap: int = SCAN_OVERLAP,
+                    max_locations: Optional[int] = MAX_LOCATIONS) -> ScanResult:
+        """Scan text that arrives in pieces, holding one piece plus the overlap at a time.
+
+        Each window only reports matches that start in front of its last
+        `overlap` characters; those are carried into the next window and
+        scanned there, with the non-overlap bookkeeping kept in absolute
+        offsets. Only a match longer than `overlap` can come out differently
+        from scanning the whole text at once.
+        """
+        keys = list(self.patterns) + list(self.literals)
+        hits = {key: [] for key in keys}
+        counts = dict.fromkeys(keys, 0)
+        ends = dict.fromkeys(keys, 0)
+        # Offset of window[0], its line number, and the offset of the last newline before it
+        base, line, newline = 0, 1, -1
+        window = ''
+        chunks = iter(chunks)
+        pending = next(chunks, '')
+        while pending is not None:
+            window += pending
+            pending = next(chunks, None)
+            if pending is not None and len(window) <= overlap:
+                continue
+            limit = len(window) if pending is None else len(window) - overlap
+            self._scan_window(window, limit, (base, line, newline), hits, counts, ends, max_locations)
+            line += window.count('\n', 0, limit)
+            last = window.rfind('\n', 0, limit)
+            if last >= 0:
+                newline = base + last
+            window, base = window[limit:], base + limit
+        return ScanResult({name: hits[name] for name in self.patterns},
+                          {literal: hits[literal] for literal in self.literals}, counts)
+
+    def _scan_window(self, text: str, limit: int, origin: Tuple[int, int, int], hits: Dict[str, list],
+                     counts: Dict[str, int], ends: Dict[str, int], max_locations: Optional[int]):
+        """Record the matches starting in text[:limit]; origin is scan_stream's (base, line, newline)"""
+        base, first_line, newline = origin
+
+        def location(start: int) -> Tuple[int, int, int]:
+            # Matches come in order, so only the text since the previous one is looked at
+            nonlocal line, line_pos, last
+            newlines = text.count('\n', line_pos, start)
+            if newlines:
+                line += newlines
+                last = text.rfind('\n', line_pos, start)
+            line_pos = start
+            return base + start, line, start - last if last >= 0 else base + start - newline
+
+        folded = text
+        if '\u0130' in text or '\u0131' in text or '\u017f' in text:
+            folded = text.translate(_CASE_FOLD)
+        folded = folded.lower()
+        line, line_pos, last = first_line, 0, -1
+        if self._regex is not None:
+            for m in self._regex.finditer(folded):
+                start = m.start()
+                if start >= limit:
+                    break
+                for group, name, literal in self._groups[folded[start]]:
+                    end = m.end(group)
+                    if end < 0:
+                        continue
+                    key = name
+                    if literal is not None:
+                        if not text.startswith(literal, start):
+                            continue
+                        key = literal
+                    if base + start < ends[key]:
+                        continue  # inside this name's previous match
+                    ends[key] = base + end
+                    counts[key] += 1
+                    if max_locations is None or len(hits[key]) < max_locations:
+                        hits[key].append(location(start))
+        for name, regex in self.fallback.items():
+            line, line_pos, last = first_line, 0, -1
+            for m in regex.finditer(text, max(ends[name] - base, 0)):
+                start = m.start()
+                if start >= limit:
+                    break
+                ends[name] = base + m.end()
+                counts[name] += 1
+                if max_locations is None or len(hits[name]) < max_locations:
+                    hits[name].append(location(start))
+
+def read_chunks(f: TextIO, totals: Dict[str, int], size: int = SCAN_CHUNK) -> Iterator[str]:
+    """Yield f `size` characters at a time, adding up characters and newlines in totals"""
+    for chunk in iter(lambda: f.read(size), ''):
+        totals['chars'] += len(chunk)
+        totals['newlines'] += chunk.count('\n')
+        yield chunk
+
+# Form controls that need a label, except the input types that are buttons or invisible
+FORM_FIELDS = ('input', 'select', 'textarea')
+UNLABELED_INPUT_TYPES = {'hidden', 'submit', 'button', 'reset', 'image'}
+_CSS_DATA_URL = re.compile(r'url\(\s*["\']?(data:[^)"\']*)', re.IGNORECASE)
+# Walking an oversized start tag by hand: its name, each attribute name (with
+# '=' if a value follows), the gaps between them, and an unquoted value's end
+_TAG_NAME = re.compile(r'<([a-zA-Z][^\t\n\r\f />\x00]*)')
+_ATTRIBUTE = re.compile(r'([^\s/>=][^\s/>=]*)(\s*=\s*)?')
+_ATTRIBUTE_GAP = re.compile(r'[\s/]*')
+_UNQUOTED_END = re.compile(r'[\s>]')
+# Characters kept of an oversized attribute value (its size is still counted in full)
+_VALUE_PREFIX = 100
+# Tail of an unfinished <script>/<style> body held back in case it holds the start of the end tag
+_CDATA_TAIL = 1024
+
+class HTMLFacts(HTMLParser):
+    """Per-element facts about one HTML document, from a single tokenizer pass.
+
+    Can be fed piecemeal (see feeding()), so it runs alongside the streamed
+    pattern scan. Every finding has the line and column of its start tag;
+    lists stop at max_items, counts cover everything. Fields are checked
+    against <label for> once the whole document has been seen.
+
+    HTMLParser holds an unfinished tag, comment or <script>/<style> body in
+    rawdata and rescans it on every feed. feed_bounded() caps that at about
+    SCAN_OVERLAP characters: script and style text is passed on as it
+    arrives, and a longer tag or comment is walked here, keeping only
+    attribute names, value sizes and the first _VALUE_PREFIX characters.
+    """
+
+    def __init__(self, max_items: Optional[int] = MAX_LOCATIONS):
+        super().__init__(convert_charrefs=True)
+        self.max_items = max_items
+        self.counts = dict.fromkeys(('images', 'images_missing_alt', 'inline_scripts', 'inline_script_bytes',
+                                     'inline_styles', 'inline_style_bytes', 'data_urls', 'data_url_bytes',
+                                     'forms', 'fields', 'unlabeled_fields', 'required_without_aria'), 0)
+        self.findings = {key: [] for key in ('images_missing_alt', 'inline_scripts', 'inline_styles', 'data_urls',
+                                             'forms', 'unlabeled_fields')}
+        self._inline = None  # finding for the <script>/<style> being read
+        self._form = None
+        self._label_depth = 0
+        self._label_for = set()
+        self._unresolved = []  # (finding, form, id) for fields not labeled in place
+        self._open = None  # oversized tag or comment being walked by hand
+        self._tag_pos = None  # where the walked start tag being handled began
+        self._value_sizes = {}  # full byte sizes of its cut-short attribute values
+
+    def feeding(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Pass chunks through, feeding each one to the parser on the way"""
+        for chunk in chunks:
+            self.feed_bounded(chunk)
+            yield chunk
+
+    def feed_bounded(self, data: str):
+        """feed(), without ever holding much more than SCAN_OVERLAP characters"""
+        if self._open is not None:
+            self.rawdata += data
+            data = self._walk_open()
+        while data is not None:
+            self.feed(data)
+            if len(self.rawdata) <= SCAN_OVERLAP:
+                return
+            if self.cdata_elem:
+                # No end tag yet: hand over all but a tail that could hold its start
+                cut = len(self.rawdata) - _CDATA_TAIL
+                self.handle_data(self.rawdata[:cut])
+                self._consume(cut)
+                return
+            self._open = self._start_open()
+            data = self._walk_open()
+
+    def _consume(self, n: int):
+        """Drop the first n buffered characters, keeping getpos() right"""
+        self.updatepos(0, n)
+        self.rawdata = self.rawdata[n:]
+
+    def _start_open(self) -> Dict[str, Any]:
+        """Take over the markup that rawdata starts with"""
+        where = self.getpos()
+        for opener, closer in (('<!--', '-->'), ('<![', ']>'), ('<!', '>'), ('<?', '>'), ('</', '>')):
+            if self.rawdata.startswith(opener):
+                self._consume(len(opener))
+                return {'until': closer}
+        name = _TAG_NAME.match(self.rawdata)
+        if name is None or name.end() == len(self.rawdata):
+            self._consume(1)
+            return {'until': '>'}
+        self._consume(name.end())
+        return {'tag': name.group(1).lower(), 'where': where, 'attrs': [], 'sizes': {}, 'value': None,
+                'self_closing': False}
+
+    def _walk_open(self) -> Optional[str]:
+        """Advance through the open markup; the text after it once it ends, else None"""
+        markup = self._open
+        if 'until' in markup:
+            end = self.rawdata.find(markup['until'])
+            if end < 0:
+                self._consume(max(len(self.rawdata) - len(markup['until']) + 1, 0))
+                return None
+            self._consume(end + len(markup['until']))
+        elif not self._walk_tag(markup):
+            return None
+        self._open = None
+        rest, self.rawdata = self.rawdata, ''
+        if 'tag' in markup:
+            self._finish_tag(markup)
+        return rest
+
+    def _walk_tag(self, tag: Dict[str, Any]) -> bool:
+        """Read attributes of an oversized start tag; True once its '>' is consumed"""
+        raw, pos = self.rawdata, 0
+        while True:
+            if tag['value'] is not None:
+                name, end_re, prefix, size = tag['value']
+                end = end_re.search(raw, pos)
+                piece = raw[pos:end.start() if end else len(raw)]
+                tag['value'][2] = prefix + piece[:_VALUE_PREFIX - len(prefix)]
+                tag['value'][3] = size + len(piece.encode('utf-8'))
+                if end is None:
+                    pos = len(raw)
+                    break
+                tag['attrs'].append((name, html.unescape(tag['value'][2])))
+                tag['sizes'][name] = tag['value'][3]
+                tag['value'] = None
+                pos = end.start() if end_re is _UNQUOTED_END else end.end()
+                continue
+            gap = _ATTRIBUTE_GAP.match(raw, pos)
+            pos = gap.end()
+            if pos == len(raw):
+                break
+            if raw[pos] == '>':
+                tag['self_closing'] = gap.group().rstrip().endswith('/')
+                self._consume(pos + 1)
+                return True
+            attribute = _ATTRIBUTE.match(raw, pos)
+            if attribute is None:
+                pos += 1  # a stray '='
+                continue
+            if attribute.end() == len(raw) and len(raw) - pos < SCAN_OVERLAP:
+                break  # the name or its '=' may go on in the next chunk
+            name = attribute.group(1).lower()
+            pos = attribute.end()
+            if not attribute.group(2):
+                tag['attrs'].append((name, None))
+            elif raw[pos:pos + 1] in ('"', "'"):
+                tag['value'] = [name, re.compile(raw[pos]), '', 0]
+                pos += 1
+            else:
+                tag['value'] = [name, _UNQUOTED_END, '', 0]
+        self._consume(pos)
+        return False
+
+    def _finish_tag(self, tag: Dict[str, Any]):
+        """Handle a walked start tag as HTMLParser.parse_starttag would have"""
+        self._tag_pos, self._value_sizes = tag['where'], tag['sizes']
+        if tag['self_closing']:
+            self.handle_startendtag(tag['tag'], tag['attrs'])
+        else:
+            self.handle_starttag(tag['tag'], tag['attrs'])
+            if tag['tag'] in self.CDATA_CONTENT_ELEMENTS:
+                self.set_cdata_mode(tag['tag'])
+        self._tag_pos, self._value_sizes = None, {}
+
+    def _add(self, key: str, finding: Dict[str, Any]):
+        self.counts[key] += 1
+        if self.max_items is None or len(self.findings[key]) < self.max_items:
+            self.findings[key].append(finding)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        line, offset = self._tag_pos or self.getpos()
+        where = {'line': line, 'column': offset + 1}
+        attributes = dict(attrs)
+        for name, value in attrs:
+            if not value:
+                continue
+            urls = [value] if value.lstrip()[:5].lower() == 'data:' else []
+            if name == 'style':
+                urls = _CSS_DATA_URL.findall(value)
+            for url in urls:
+                size = self._value_sizes[name] if url is value and name in self._value_sizes \
+                    else len(url.encode('utf-8'))
+                self.counts['data_url_bytes'] += size
+                self._add('data_urls', dict(where, tag=tag, attribute=name, bytes=size))
+        if tag == 'img':
+            self.counts['images'] += 1
+            if 'alt' not in attributes:
+                self._add('images_missing_alt', dict(where, src=(attributes.get('src') or '')[:100]))
+        elif tag in ('script', 'style') and 'src' not in attributes:
+            self._inline = dict(where, bytes=0, kind=tag)
+        elif tag == 'form':
+            self._form = dict(where, id=attributes.get('id'), fields=0, unlabeled=0)
+            self._add('forms', self._form)
+        elif tag == 'label':
+            self._label_depth += 1
+            if attributes.get('for'):
+                self._label_for.add(attributes['for'])
+        elif tag in FORM_FIELDS:
+            if tag == 'input' and (attributes.get('type') or 'text').lower() in UNLABELED_INPUT_TYPES:
+                return
+            self.counts['fields'] += 1
+            if self._form is not None:
+                self._form['fields'] += 1
+            if 'required' in attributes and 'aria-required' not in attributes:
+                self.counts['required_without_aria'] += 1
+            if self._label_depth or attributes.get('aria-label') or attributes.get('aria-labelledby') \
+                    or attributes.get('title'):
+                return
+            finding = dict(where, tag=tag, id=attributes.get('id'), name=attributes.get('name'))
+            self._unresolved.append((finding, self._form, attributes.get('id')))
+
+    def handle_endtag(self, tag: str):
+        if tag in ('script', 'style') and self._inline is not None:
+            kind = self._inline.pop('kind')
+            self.counts[f'inline_{kind}_bytes'] += self._inline['bytes']
+            self._add(f'inline_{kind}s', self._inline)
+            self._inline = None
+        elif tag == 'form':
+            self._form = None
+        elif tag == 'label':
+            self._label_depth = max(self._label_depth - 1, 0)
+
+    def handle_data(self, data: str):
+        if self._inline is not None:
+            self._inline['bytes'] += len(data.encode('utf-8'))
+
+    def close(self):
+        if self._open is not None:
+            # The document ended inside it
+            self._open = None
+            self.rawdata = ''
+        super().close()
+        for finding, form, field_id in self._unresolved:
+            if field_id and field_id in self._label_for:
+                continue
+            if form is not None:
+                form['unlabeled'] += 1
+            self._add('unlabeled_fields', finding)
+        self._unresolved = []
+
+    def report(self) -> Dict[str, Any]:
+        return dict(self.findings, counts=dict(self.counts))
+
+# File types the tree walk analyzes, by extension
+SOURCE_TYPES = {
+    '.html': 'html',
+    '.htm': 'html',
+    '.js': 'javascript',
+    '.mjs': 'javascript',
+    '.cjs': 'javascript',
+    '.css': 'css',
+}
+# Never descended into, ignored or not
+SKIP_DIRS = {'.git', 'node_modules'}
+# Bytes read to decide whether a file is binary (a NUL byte means it is)
+SNIFF_BYTES = 8192
+
+def _glob_to_regex(glob: str) -> str:
+    """Translate a .gitignore glob (with ** support) to a regex on '/'-separated paths"""
+    out, i = [], 0
+    while i < len(glob):
+        ch = glob[i]
+        if glob.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif glob.startswith('/**', i) and i + 3 == len(glob):
+            out.append('/.*')
+            i += 3
+        elif glob.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif ch == '*':
+            out.append('[^/]*')
+            i += 1
+        elif ch == '?':
+            out.append('[^/]')
+            i += 1
+        elif ch == '[':
+            end = glob.find(']', i + 2)
+            if end < 0:
+                out.append(re.escape(ch))
+                i += 1
+                continue
+            body = glob[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append(f'[{body}]')
+            i = end + 1
+        elif ch == '\\' and i + 1 < len(glob):
+            out.append(re.escape(glob[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(ch))
+            i += 1
+    return ''.join(out)
+
+class GitIgnore:
+    """The .gitignore rules in effect for a directory walk.
+
+    Each .gitignore applies to paths below its own directory; rules are
+    checked in order with the last match winning, so deeper files and
+    later lines override earlier ones and '!' re-includes.
+    """
+
+    def __init__(self):
+        self.rules = []  # (base dir, regex, negated, directories only)
+
+    def add_file(self, path: str):
+        base = os.path.dirname(os.path.abspath(path))
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            if negated or line.startswith('\\'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            # A slash anywhere but the end anchors the pattern to this .gitignore's directory
+            anchored = '/' in line
+            regex = _glob_to_regex(line.lstrip('/'))
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+            self.rules.append((base, re.compile(regex + '$'), negated, dir_only))
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        path = os.path.abspath(path)
+        result = False
+        for base, regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            rel = os.path.relpath(path, base)
+            if rel.startswith('..'):
+                continue
+            if regex.match(rel.replace(os.sep, '/')):
+                result = not negated
+        return result
+
+def _repo_ancestors(root: str) -> List[str]:
+    """Directories from the enclosing git repository's top down to root's parent"""
+    root = os.path.abspath(root)
+    chain, current = [], os.path.dirname(root)
+    while True:
+        chain.append(current)
+        if os.path.isdir(os.path.join(current, '.git')) or os.path.dirname(current) == current:
+            break
+        current = os.path.dirname(current)
+    if not os.path.isdir(os.path.join(root, '.git')) and os.path.isdir(os.path.join(chain[-1], '.git')):
+        return list(reversed(chain))
+    return []
+
+def is_binary(path: str) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return b'\0' in f.read(SNIFF_BYTES)
+    except OSError:
+        return True
+
+def discover_files(root: str = '.', types: Dict[str, str] = SOURCE_TYPES) -> List[Tuple[str, str]]:
+    """(path, file type) for every source file under root that git wouldn't ignore"""
+    ignore = GitIgnore()
+    for directory in _repo_ancestors(root):
+        ignore.add_file(os.path.join(directory, '.gitignore'))
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        if '.gitignore' in filenames:
+            ignore.add_file(os.path.join(dirpath, '.gitignore'))
+        dirnames[:] = sorted(d for d in dirnames
+                             if d not in SKIP_DIRS and not ignore.ignored(os.path.join(dirpath, d), True))
+        for name in sorted(filenames):
+            file_type = types.get(os.path.splitext(name)[1].lower())
+            path = os.path.join(dirpath, name)
+            if file_type and not ignore.ignored(path, False) and not is_binary(path):
+                found.append((path, file_type))
+    return found
+
+# Per-file results from earlier runs, reused while a file and the rules are unchanged
+ANALYSIS_CACHE = '.platform-analysis-cache.json'
+# A file modified this close to being hashed could change again within the
+# same mtime tick, so its size/mtime alone isn't trusted on the next run
+RACY_MTIME_NS = 2_000_000_000
+
+def report_timestamp() -> str:
+    """Now, or $SOURCE_DATE_EPOCH when set so reruns produce identical reports"""
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch:
+        return datetime.fromtimestamp(int(epoch)).isoformat()
+    return datetime.now().isoformat()
+
+class AnalysisCache:
+    """analyze_file() results on disk, keyed by path and file type.
+
+    Each entry records the size, mtime and SHA-256 the result was computed
+    from; the whole cache is dropped when the rule-set version changes.
+    An unchanged size and mtime is a hit without reading the file, unless
+    the entry is racy, in which case the content hash decides.
+    """
+
+    def __init__(self, path: str, rules_version: str):
+        self.path = path
+        self.rules_version = rules_version
+        self.entries = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('rules_version') == rules_version:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def lookup(self, path: str, file_type: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Return (cached analysis, None) on a hit, (None, fingerprint to store) on a miss"""
+        key = f"{file_type}:{os.path.abspath(path)}"
+        try:
+            st = os.stat(path)
+            entry = self.entries.get(key)
+            if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns \
+                    and entry['mtime_ns'] + RACY_MTIME_NS < entry['hashed_ns']:
+                self.hits += 1
+                return dict(entry['analysis']), None
+            hashed_ns = time.time_ns()
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(SCAN_CHUNK), b''):
+                    digest.update(block)
+            sha256 = digest.hexdigest()
+        except OSError:
+            return None, None  # analyze_file reports the error; nothing to cache
+        fingerprint = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': sha256, 'hashed_ns': hashed_ns}
+        if entry and entry['sha256'] == sha256:
+            # Touched but not changed
+            entry.update(fingerprint)
+            self.dirty = True
+            self.hits += 1
+            return dict(entry['analysis']), None
+        self.misses += 1
+        return None, fingerprint
+
+    def store(self, path: str, file_type: str, fingerprint: Dict[str, Any], analysis: Dict[str, Any]):
+        self.entries[f"{file_type}:{os.path.abspath(path)}"] = dict(fingerprint, analysis=dict(analysis))
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        entries = {key: entry for key, entry in self.entries.items() if os.path.exists(key.split(':', 1)[1])}
+        # A temp file of its own, so concurrent savers (the refresh thread, a
+        # tree build) each replace the cache with a whole document
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(prefix=f"{os.path.basename(self.path)}.", suffix='.tmp',
+                                       dir=os.path.dirname(self.path) or '.')
+            with open(fd, 'w', encoding='utf-8') as f:
+                json.dump({'rules_version': self.rules_version, 'entries': entries}, f)
+            os.replace(tmp, self.path)
+            self.dirty = False
+        except OSError as e:
+            if tmp is not None:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+            print(f"⚠️  Could not save analysis cache {self.path}: {e}")
 
 class PlatformAnalyzer:
     """Main analyzer class for examining the platform components"""
     
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = ANALYSIS_CACHE, verbose: bool = True):
+        self.verbose = verbose
         self.analysis_results = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': report_timestamp(),
             'admin_dashboard': {},
             'user_portal': {},
             'overall_recommendations': [],
@@ -56,45 +839,77 @@ class PlatformAnalyzer:
             'performance_issues': r'(setInterval|setTimeout).*1000',
             'security_issues': r'(innerHTML|document\.write|eval)'
         }
+        # One pass finds every pattern and the literals the structure checks need
+        self.scanner = PatternScanner(self.patterns, STRUCTURE_LITERALS)
+        self.cache = AnalysisCache(cache_path, self.rules_version()) if cache_path else None
+    
+    def log(self, message: str):
+        if self.verbose:
+            print(message)
+    
+    def rules_version(self) -> str:
+        """Changes whenever the analyzer code, its patterns or its literals do"""
+        digest = hashlib.sha256(Path(__file__).read_bytes())
+        digest.update(json.dumps([self.patterns, STRUCTURE_LITERALS, SOURCE_TYPES], sort_keys=True).encode())
+        return digest.hexdigest()
+    
+    def analyze_file_cached(self, file_path: str, file_type: str) -> Dict[str, Any]:
+        """analyze_file(), answered from the cache when the file hasn't changed"""
+        if self.cache is None:
+            return self.analyze_file(file_path, file_type)
+        analysis, fingerprint = self.cache.lookup(file_path, file_type)
+        if analysis is None:
+            analysis = self.analyze_file(file_path, file_type)
+            if fingerprint:
+                self.cache.store(file_path, file_type, fingerprint, analysis)
+        analysis['file_path'] = file_path
+        return analysis
     
     def analyze_file(self, file_path: str, file_type: str) -> Dict[str, Any]:
         """Analyze a single file for various issues and improvements"""
         try:
+            # Streamed, so memory stays flat however large the file is
+            totals = {'chars': 0, 'newlines': 0}
+            facts = HTMLFacts() if file_type == 'html' else None
             with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+                chunks = read_chunks(f, totals)
+                scan = self.scanner.scan_stream(facts.feeding(chunks) if facts else chunks)
+            if facts:
+                facts.close()
             
             analysis = {
                 'file_path': file_path,
-                'file_size': len(content),
-                'lines': len(content.split('\n')),
+                'file_size': totals['chars'],
+                'lines': totals['newlines'] + 1,
                 'issues': [],
                 'improvements': [],
                 'metrics': {}
             }
             
             # Analyze patterns
-            for pattern_name, pattern in self.patterns.items():
-                matches = re.findall(pattern, content, re.IGNORECASE)
-                if matches:
+            for pattern_name in self.patterns:
+                count = scan.count(pattern_name)
+                if count:
                     analysis['issues'].append({
                         'type': pattern_name,
-                        'count': len(matches),
-                        'description': self.get_pattern_description(pattern_name)
+                        'count': count,
+                        'description': self.get_pattern_description(pattern_name),
+                        'locations': scan.locations(pattern_name)
                     })
             
             # Analyze HTML structure
             if file_type == 'html':
-                html_analysis = self.analyze_html_structure(content)
+                html_analysis = self.analyze_html_structure(None, scan, facts)
                 analysis.update(html_analysis)
             
             # Analyze JavaScript
-            if file_type == 'javascript' or '<script>' in content:
-                js_analysis = self.analyze_javascript(content)
+            if file_type == 'javascript' or scan.found('<script>'):
+                js_analysis = self.analyze_javascript(None, scan)
                 analysis.update(js_analysis)
             
             # Analyze CSS
-            if file_type == 'css' or '<style>' in content:
-                css_analysis = self.analyze_css(content)
+            if file_type == 'css' or scan.found('<style>'):
+                css_analysis = self.analyze_css(None, scan)
                 analysis.update(css_analysis)
             
             return analysis
@@ -107,10 +922,17 @@ class PlatformAnalyzer:
                 'improvements': []
             }
     
-    def analyze_html_structure(self, content: str) -> Dict[str, Any]:
+    def analyze_html_structure(self, content: Optional[str], scan: ScanResult = None,
+                               facts: HTMLFacts = None) -> Dict[str, Any]:
         """Analyze HTML structure and accessibility"""
+        scan = scan or self.scanner.scan(content)
+        if facts is None:
+            facts = HTMLFacts()
+            facts.feed_bounded(content)
+            facts.close()
         analysis = {
             'html_metrics': {},
+            'html_elements': facts.report(),
             'accessibility_issues': [],
             'semantic_improvements': []
         }
@@ -118,28 +940,28 @@ class PlatformAnalyzer:
         # Check for semantic HTML elements
         semantic_elements = ['header', 'nav', 'main', 'section', 'article', 'aside', 'footer']
         for element in semantic_elements:
-            count = content.count(f'<{element}')
+            count = scan.count(f'<{element}')
             if count > 0:
                 analysis['html_metrics'][f'{element}_count'] = count
         
         # Check for accessibility attributes
-        if 'alt=' not in content:
+        if facts.counts['images_missing_alt']:
             analysis['accessibility_issues'].append('Missing alt attributes on images')
         
-        if 'aria-label' not in content and 'aria-labelledby' not in content:
+        if not scan.found('aria-label') and not scan.found('aria-labelledby'):
             analysis['accessibility_issues'].append('Missing ARIA labels')
         
         # Check for form accessibility
-        if '<form' in content:
-            if 'label' not in content:
-                analysis['accessibility_issues'].append('Forms missing proper labels')
-            if 'required' in content and 'aria-required' not in content:
-                analysis['accessibility_issues'].append('Required fields missing ARIA required attribute')
+        if facts.counts['unlabeled_fields']:
+            analysis['accessibility_issues'].append('Form fields missing proper labels')
+        if facts.counts['required_without_aria']:
+            analysis['accessibility_issues'].append('Required fields missing ARIA required attribute')
         
         return analysis
     
-    def analyze_javascript(self, content: str) -> Dict[str, Any]:
+    def analyze_javascript(self, content: Optional[str], scan: ScanResult = None) -> Dict[str, Any]:
         """Analyze JavaScript code quality and patterns"""
+        scan = scan or self.scanner.scan(content)
         analysis = {
             'js_metrics': {},
             'code_quality_issues': [],
@@ -147,26 +969,27 @@ class PlatformAnalyzer:
         }
         
         # Check for modern JavaScript features
-        if 'const ' in content or 'let ' in content:
+        if scan.found('const ') or scan.found('let '):
             analysis['js_metrics']['modern_js'] = True
         
-        if 'async ' in content or 'await ' in content:
+        if scan.found('async ') or scan.found('await '):
             analysis['js_metrics']['async_await'] = True
         
         # Check for potential memory leaks
-        if 'addEventListener' in content and 'removeEventListener' not in content:
+        if scan.found('addEventListener') and not scan.found('removeEventListener'):
             analysis['code_quality_issues'].append('Event listeners added without removal strategy')
         
         # Check for error handling
-        if 'try {' in content and 'catch' in content:
+        if scan.found('try {') and scan.found('catch'):
             analysis['js_metrics']['error_handling'] = True
         else:
             analysis['code_quality_issues'].append('Missing error handling in critical functions')
         
         return analysis
     
-    def analyze_css(self, content: str) -> Dict[str, Any]:
+    def analyze_css(self, content: Optional[str], scan: ScanResult = None) -> Dict[str, Any]:
         """Analyze CSS structure and best practices"""
+        scan = scan or self.scanner.scan(content)
         analysis = {
             'css_metrics': {},
             'css_issues': [],
@@ -174,16 +997,16 @@ class PlatformAnalyzer:
         }
         
         # Check for responsive design
-        if '@media' in content:
+        if scan.found('@media'):
             analysis['responsive_design'] = True
-            analysis['css_metrics']['media_queries'] = content.count('@media')
+            analysis['css_metrics']['media_queries'] = scan.count('@media')
         
         # Check for CSS variables
-        if 'var(--' in content:
+        if scan.found('var(--'):
             analysis['css_metrics']['css_variables'] = True
         
         # Check for flexbox/grid
-        if 'display: flex' in content or 'display: grid' in content:
+        if scan.found('display: flex') or scan.found('display: grid'):
             analysis['css_metrics']['modern_layout'] = True
         
         return analysis
@@ -204,7 +1027,7 @@ class PlatformAnalyzer:
     
     def analyze_admin_dashboard(self) -> Dict[str, Any]:
         """Comprehensive analysis of the admin dashboard"""
-        print("🔍 Analyzing Admin Dashboard...")
+        self.log("🔍 Analyzing Admin Dashboard...")
         
         dashboard_analysis = {
             'overview': 'Admin dashboard for managing users, jobs, and contracts',
@@ -216,7 +1039,7 @@ class PlatformAnalyzer:
         
         # Analyze main dashboard file
         if os.path.exists('admin-dashboard.html'):
-            dashboard_analysis['file_analysis']['main'] = self.analyze_file('admin-dashboard.html', 'html')
+            dashboard_analysis['file_analysis']['main'] = self.analyze_file_cached('admin-dashboard.html', 'html')
         
         # Identify strengths
         dashboard_analysis['strengths'] = [
@@ -255,7 +1078,7 @@ class PlatformAnalyzer:
     
     def analyze_user_portal(self) -> Dict[str, Any]:
         """Comprehensive analysis of the user portal"""
-        print("🔍 Analyzing User Portal...")
+        self.log("🔍 Analyzing User Portal...")
         
         portal_analysis = {
             'overview': 'User portal for contractors to manage contracts and payments',
@@ -267,7 +1090,7 @@ class PlatformAnalyzer:
         
         # Analyze main portal file
         if os.path.exists('user-portal.html'):
-            portal_analysis['file_analysis']['main'] = self.analyze_file('user-portal.html', 'html')
+            portal_analysis['file_analysis']['main'] = self.analyze_file_cached('user-portal.html', 'html')
         
         # Identify strengths
         portal_analysis['strengths'] = [
@@ -306,7 +1129,7 @@ class PlatformAnalyzer:
     
     def generate_overall_recommendations(self):
         """Generate overall platform recommendations"""
-        print("📋 Generating Overall Recommendations...")
+        self.log("📋 Generating Overall Recommendations...")
         
         self.analysis_results['overall_recommendations'] = [
             {
@@ -353,10 +1176,97 @@ class PlatformAnalyzer:
             }
         ]
     
+    def analyze_tree(self, root: str = '.', workers: Optional[int] = None) -> Dict[str, Any]:
+        """Analyze every source file under root across a process pool.
+        
+        Files unchanged since the last run come from the cache; only the
+        rest are scanned, and the summary is rebuilt from all of them.
+        """
+        started = time.perf_counter()
+        results, pending, types = {}, [], {}
+        for path, file_type in discover_files(root):
+            types[path] = file_type
+            analysis, fingerprint = self.cache.lookup(path, file_type) if self.cache else (None, None)
+            if analysis is not None:
+                results[path] = analysis
+            else:
+                pending.append((path, file_type, fingerprint))
+        workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+        # Biggest files first so one large page doesn't finish last on its own
+        pending.sort(key=lambda item: -(item[2] or {}).get('size', 0))
+        files = [(path, file_type) for path, file_type, _ in pending]
+        if workers == 1:
+            analyses = [self.analyze_file(path, file_type) for path, file_type in files]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.patterns,)) as pool:
+                analyses = list(pool.map(_analyze_in_worker, files))
+        for (path, file_type, fingerprint), analysis in zip(pending, analyses):
+            if self.cache is not None and fingerprint:
+                self.cache.store(path, file_type, fingerprint, analysis)
+            results[path] = analysis
+        if self.cache is not None:
+            self.cache.save()
+        per_file = {}
+        for path in sorted(results):
+            analysis = results[path]
+            analysis['file_path'] = os.path.relpath(path, root)
+            analysis['file_type'] = types[path]
+            per_file[analysis['file_path']] = analysis
+        return {
+            'root': os.path.abspath(root),
+            'summary': self.aggregate_tree(per_file),
+            'files': per_file,
+            # How this run went; kept out of the summary so reports only change with the code
+            'run': {
+                'workers': workers,
+                'analyzed': len(pending),
+                'cached': len(results) - len(pending),
+                'elapsed_seconds': round(time.perf_counter() - started, 3)
+            }
+        }
+    
+    def aggregate_tree(self, per_file: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Totals across a tree: per issue type, per file type and per finding"""
+        summary = {
+            'files_analyzed': len(per_file),
+            'total_lines': 0,
+            'total_bytes': 0,
+            'errors': [],
+            'by_file_type': {},
+            'issue_totals': {},
+            'html_element_totals': {},
+            'findings': {}
+        }
+        for path, analysis in per_file.items():
+            if 'error' in analysis:
+                summary['errors'].append({'file_path': path, 'error': analysis['error']})
+                continue
+            summary['total_lines'] += analysis['lines']
+            summary['total_bytes'] += analysis['file_size']
+            by_type = summary['by_file_type'].setdefault(analysis['file_type'], {'files': 0, 'lines': 0})
+            by_type['files'] += 1
+            by_type['lines'] += analysis['lines']
+            for issue in analysis['issues']:
+                totals = summary['issue_totals'].setdefault(issue['type'], {
+                    'count': 0, 'files': 0, 'description': issue['description'], 'top_files': []
+                })
+                totals['count'] += issue['count']
+                totals['files'] += 1
+                totals['top_files'].append({'file_path': path, 'count': issue['count']})
+            for key, count in analysis.get('html_elements', {}).get('counts', {}).items():
+                summary['html_element_totals'][key] = summary['html_element_totals'].get(key, 0) + count
+            for key in ('accessibility_issues', 'code_quality_issues', 'css_issues'):
+                for finding in analysis.get(key, []):
+                    summary['findings'][finding] = summary['findings'].get(finding, 0) + 1
+        for totals in summary['issue_totals'].values():
+            totals['top_files'] = sorted(totals['top_files'], key=lambda f: (-f['count'], f['file_path']))[:10]
+        return summary
+    
     def run_comprehensive_analysis(self) -> Dict[str, Any]:
         """Run the complete platform analysis"""
-        print("🚀 Starting Comprehensive Platform Analysis...")
-        print("=" * 60)
+        self.log("🚀 Starting Comprehensive Platform Analysis...")
+        self.log("=" * 60)
         
         # Analyze admin dashboard
         self.analysis_results['admin_dashboard'] = self.analyze_admin_dashboard()
@@ -364,6 +1274,9 @@ class PlatformAnalyzer:
         # Analyze user portal
         self.analysis_results['user_portal'] = self.analyze_user_portal()
         
+        if self.cache is not None:
+            self.cache.save()
+        
         # Generate overall recommendations
         self.generate_overall_recommendations()
         
@@ -393,9 +1306,202 @@ class PlatformAnalyzer:
             'No bulk operations for admin tasks'
         ]
         
-        print("✅ Analysis Complete!")
+        self.log("✅ Analysis Complete!")
         return self.analysis_results
 
+# Process-pool workers build their analyzer once and reuse it for every file
+_worker_analyzer = None
+
+def _init_worker(patterns: Dict[str, str]):
+    global _worker_analyzer
+    _worker_analyzer = PlatformAnalyzer(cache_path=None)
+    if patterns != _worker_analyzer.patterns:
+        _worker_analyzer.patterns = dict(patterns)
+        _worker_analyzer.scanner = PatternScanner(patterns, STRUCTURE_LITERALS)
+
+def _analyze_in_worker(item: Tuple[str, str]) -> Dict[str, Any]:
+    path, file_type = item
+    return _worker_analyzer.analyze_file(path, file_type)
+
+# Serving: how often the held analysis is redone (which also picks up new files),
+# how often the analyzed files are stat'ed for changes, and how long clients may
+# show a stale copy while revalidating
+REFRESH_INTERVAL_S = 300
+WATCH_INTERVAL_S = 2
+STALE_WHILE_REVALIDATE_S = 60
+
+class AnalysisStore:
+    """The latest analysis, held in memory for AnalysisHTTPServer.
+
+    Requests are answered from here and never wait for an analysis: a
+    background thread redoes it every refresh_interval seconds and as soon
+    as a file the last refresh analyzed changes, and a request that finds
+    the result stale just starts a refresh (stale-while-revalidate). A
+    refresh whose content matches the held result keeps the old body and
+    ETag. The watcher only stats files; the tree is walked by refreshes,
+    starting with the one its first request triggers.
+    """
+
+    def __init__(self, root: str = '.', cache_path: Optional[str] = ANALYSIS_CACHE,
+                 refresh_interval: float = REFRESH_INTERVAL_S, watch_interval: float = WATCH_INTERVAL_S):
+        self.root = root
+        self.cache_path = cache_path
+        self.refresh_interval = refresh_interval
+        self.watch_interval = watch_interval
+        self.results = None
+        self.bodies = {}  # 'analysis' / 'tree' -> (JSON bytes, ETag)
+        self.serve_tree = False  # the tree report is only built once someone asks for it
+        self.generated_at = None
+        self.checked_at = None
+        self.refreshing = False
+        self.refresh_count = 0
+        self.last_duration = None
+        self.last_error = None
+        self.last_cache = None
+        self._watched = {}  # directory -> names of the files the last refresh analyzed
+        self._signature = None
+        self._checked_mono = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def watch_list(self, tree: bool) -> Dict[str, List[str]]:
+        """The files a refresh analyzes (and the analyzer itself), by directory"""
+        paths = ['admin-dashboard.html', 'user-portal.html', os.path.abspath(__file__)]
+        if tree:
+            paths += [path for path, _ in discover_files(self.root)]
+        watched = {}
+        for path in paths:
+            watched.setdefault(os.path.dirname(path) or '.', []).append(os.path.basename(path))
+        return {directory: sorted(set(names)) for directory, names in sorted(watched.items())}
+
+    def signature(self, watched: Dict[str, List[str]]) -> str:
+        """Size and mtime of the watched files, from one scandir per directory"""
+        digest = hashlib.sha256()
+        for directory, names in watched.items():
+            try:
+                with os.scandir(directory) as it:
+                    entries = {entry.name: entry for entry in it}
+            except OSError:
+                entries = {}
+            for name in names:
+                try:
+                    st = entries[name].stat()
+                    digest.update(f"{directory}/{name}\0{st.st_size}\0{st.st_mtime_ns}\0".encode())
+                except (KeyError, OSError):
+                    digest.update(f"{directory}/{name}\0missing\0".encode())
+        return digest.hexdigest()
+
+    def refresh_now(self, verbose: bool = False) -> Dict[str, Any]:
+        """Run the analysis in this thread and publish it"""
+        started = time.perf_counter()
+        try:
+            serve_tree = self.serve_tree
+            watched = self.watch_list(serve_tree)
+            signature = self.signature(watched)
+            analyzer = PlatformAnalyzer(self.cache_path, verbose=verbose)
+            results = analyzer.run_comprehensive_analysis()
+            tree = analyzer.analyze_tree(self.root) if serve_tree else None
+        except Exception as e:
+            with self._lock:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.refreshing = False
+            raise
+        bodies = {'analysis': self._encode(results, 'timestamp')}
+        if tree is not None:
+            bodies['tree'] = self._encode(tree, 'run')
+        with self._lock:
+            for name, (body, etag) in bodies.items():
+                if self.bodies.get(name, (None, None))[1] != etag:
+                    self.bodies[name] = (body, etag)
+                    if name == 'analysis':
+                        self.results = results
+                        self.generated_at = results['timestamp']
+            self._watched, self._signature = watched, signature
+            self._checked_mono = time.monotonic()
+            self.checked_at = datetime.now().isoformat()
+            self.refreshing = False
+            self.refresh_count += 1
+            self.last_duration = round(time.perf_counter() - started, 3)
+            self.last_error = None
+            if analyzer.cache is not None:
+                self.last_cache = {'unchanged': analyzer.cache.hits, 'rescanned': analyzer.cache.misses}
+        return self.results
+
+    def tree_body(self) -> Optional[Tuple[bytes, str]]:
+        """The tree report, or None while the background refresh that first builds it runs"""
+        with self._lock:
+            self.serve_tree = True
+            body = self.bodies.get('tree')
+        if body is None:
+            self.request_refresh('tree requested')
+        return body
+
+    @staticmethod
+    def _encode(results: Dict[str, Any], volatile_key: str) -> Tuple[bytes, str]:
+        """JSON body plus an ETag over everything but the per-run key"""
+        content = {key: value for key, value in results.items() if key != volatile_key}
+        etag = hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+        return json.dumps(results, indent=2).encode('utf-8'), f'"{etag}"'
+
+    def request_refresh(self, reason: str) -> bool:
+        """Start a background refresh unless one is running; returns whether it started"""
+        with self._lock:
+            if self.refreshing:
+                return False
+            self.refreshing = True
+        threading.Thread(target=self._refresh_in_background, args=(reason,), name='analysis-refresh',
+                         daemon=True).start()
+        return True
+
+    def _refresh_in_background(self, reason: str):
+        try:
+            self.refresh_now()
+            print(f"♻️  Analysis refreshed ({reason}) in {self.last_duration}s")
+        except Exception as e:
+            print(f"❌ Analysis refresh failed ({reason}): {e}")
+            return
+        # The tree was first asked for after this refresh had started
+        if self.serve_tree and 'tree' not in self.bodies:
+            self.request_refresh('tree requested')
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._checked_mono >= self.refresh_interval
+
+    def start(self):
+        """Watch for file changes and the refresh schedule in a background thread"""
+        self._stop.clear()
+        threading.Thread(target=self._watch, name='analysis-watch', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_interval):
+            try:
+                if self.signature(self._watched) != self._signature:
+                    self.request_refresh('files changed')
+                elif self.is_stale():
+                    self.request_refresh('scheduled')
+            except Exception as e:
+                print(f"⚠️  Analysis watcher: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'etag': self.bodies.get('analysis', (None, None))[1],
+                'generated_at': self.generated_at,
+                'checked_at': self.checked_at,
+                'age_seconds': round(time.monotonic() - self._checked_mono, 1),
+                'stale': self.is_stale(),
+                'refreshing': self.refreshing,
+                'tree_ready': 'tree' in self.bodies,
+                'refresh_count': self.refresh_count,
+                'last_refresh_seconds': self.last_duration,
+                'last_cache': self.last_cache,
+                'last_error': self.last_error,
+                'refresh_interval_seconds': self.refresh_interval
+            }
+
 class AnalysisHTTPServer(http.server.SimpleHTTPRequestHandler):
     """HTTP server to serve analysis results"""
     
@@ -403,10 +1509,25 @@ class AnalysisHTTPServer(http.server.SimpleHTTPRequestHandler):
         """Handle GET requests"""
         parsed_path = urllib.parse.urlparse(self.path)
         
+        store = self.server.store
+        
         if parsed_path.path == '/':
             self.send_analysis_page()
-        elif parsed_path.path == '/api/analysis':
-            self.send_analysis_json()
+        elif parsed_path.path in ('/api/analysis', '/api/analysis/tree'):
+            if 'refresh' in urllib.parse.parse_qs(parsed_path.query):
+                store.request_refresh('requested')
+            elif store.is_stale():
+                store.request_refresh('stale on request')
+            if parsed_path.path.endswith('/tree'):
+                tree = store.tree_body()
+                if tree is None:
+                    self.send_status_json(store.status(), 202)
+                else:
+                    self.send_cached_json(*tree)
+            else:
+                self.send_cached_json(*store.bodies['analysis'])
+        elif parsed_path.path == '/api/analysis/status':
+            self.send_status_json(store.status())
         else:
             super().do_GET()
     
@@ -419,17 +1540,35 @@ class AnalysisHTTPServer(http.server.SimpleHTTPRequestHandler):
         html_content = self.generate_analysis_html()
         self.wfile.write(html_content.encode('utf-8'))
     
-    def send_analysis_json(self):
-        """Send analysis results as JSON"""
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
+    def send_cached_json(self, body: bytes, etag: str):
+        """Send a held result, or 304 if the client already has it"""
+        not_modified = etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]
+        self.send_response(304 if not_modified else 200)
+        if not not_modified:
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', f'max-age=0, stale-while-revalidate={STALE_WHILE_REVALIDATE_S}')
         self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Expose-Headers', 'ETag')
         self.end_headers()
         
-        analyzer = PlatformAnalyzer()
-        results = analyzer.run_comprehensive_analysis()
+        if not not_modified:
+            self.wfile.write(body)
+    
+    def send_status_json(self, status: Dict[str, Any], code: int = 200):
+        """Send the refresh state of the held analysis (202 while a requested result is being built)"""
+        body = json.dumps(status).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        if code == 202:
+            self.send_header('Retry-After', str(max(int(WATCH_INTERVAL_S), 1)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
         
-        self.wfile.write(json.dumps(results, indent=2).encode('utf-8'))
+        self.wfile.write(body)
     
     def generate_analysis_html(self) -> str:
         """Generate the analysis HTML page"""
@@ -644,7 +1783,7 @@ class AnalysisHTTPServer(http.server.SimpleHTTPRequestHandler):
             <h2 class="section-title">🔧 Action Items</h2>
             <div id="actionItems">
                 <p>Click the button below to run a fresh analysis:</p>
-                <button class="btn" onclick="runAnalysis()">🔄 Run Fresh Analysis</button>
+                <button class="btn" onclick="runAnalysis(event)">🔄 Run Fresh Analysis</button>
                 <button class="btn" onclick="downloadReport()">📥 Download Report</button>
             </div>
         </div>
@@ -652,20 +1791,42 @@ class AnalysisHTTPServer(http.server.SimpleHTTPRequestHandler):
     
     <script>
         let analysisData = null;
+        let analysisEtag = null;
+        
+        async function loadAnalysis(url) {
+            const response = await fetch(url);
+            analysisEtag = response.headers.get('ETag');
+            analysisData = await response.json();
+            updateAnalysisDisplay();
+        }
         
-        async function runAnalysis() {
+        // The server re-analyzes in the background; pick up new results when its ETag moves
+        async function checkForUpdates() {
+            const status = await (await fetch('/api/analysis/status')).json();
+            if (status.etag && status.etag !== analysisEtag) {
+                await loadAnalysis('/api/analysis');
+            }
+            return status;
+        }
+        
+        async function runAnalysis(event) {
             try {
                 // Show loading states
                 document.querySelectorAll('.loading').forEach(el => {
                     el.innerHTML = 'Running analysis...';
                 });
                 
-                // Fetch analysis data
-                const response = await fetch('/api/analysis');
-                analysisData = await response.json();
-                
-                // Update the UI
-                updateAnalysisDisplay();
+                if (!event || event.type === 'load') {
+                    await loadAnalysis('/api/analysis');
+                    return;
+                }
+                // Fresh analysis: show the current result, then wait for the refresh to land
+                await loadAnalysis('/api/analysis?refresh=1');
+                let status = await checkForUpdates();
+                while (status.refreshing) {
+                    await new Promise(resolve => setTimeout(resolve, 1000));
+                    status = await checkForUpdates();
+                }
                 
             } catch (error) {
                 console.error('Analysis failed:', error);
@@ -763,19 +1924,73 @@ class AnalysisHTTPServer(http.server.SimpleHTTPRequestHandler):
         
         // Auto-run analysis on page load
         window.addEventListener('load', runAnalysis);
+        setInterval(() => checkForUpdates().catch(() => {}), 30000);
     </script>
 </body>
 </html>
         """
 
+def save_report(results: Dict[str, Any], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+def run_tree_report(root: str, workers: Optional[int], output: str, cache_path: Optional[str]) -> int:
+    """Analyze every source file under root, print the totals and save the full report"""
+    print(f"🔍 Analyzing source tree {os.path.abspath(root)}...")
+    report = PlatformAnalyzer(cache_path).analyze_tree(root, workers)
+    summary, run = report['summary'], report['run']
+    print(f"✅ {summary['files_analyzed']} files, {summary['total_lines']} lines "
+          f"in {run['elapsed_seconds']}s ({run['analyzed']} scanned with {run['workers']} "
+          f"process{'es' if run['workers'] != 1 else ''}, "
+          f"{run['cached']} unchanged from cache)")
+    for file_type, totals in sorted(summary['by_file_type'].items()):
+        print(f"   {file_type}: {totals['files']} files, {totals['lines']} lines")
+    for issue_type, totals in sorted(summary['issue_totals'].items(), key=lambda item: -item[1]['count']):
+        worst = totals['top_files'][0]
+        print(f"⚠️  {issue_type}: {totals['count']} in {totals['files']} files "
+              f"(most in {worst['file_path']}: {worst['count']})")
+    elements = summary['html_element_totals']
+    if elements:
+        print(f"🏷️  HTML: {elements['images_missing_alt']} of {elements['images']} images without alt, "
+              f"{elements['unlabeled_fields']} of {elements['fields']} form fields unlabeled, "
+              f"{elements['inline_script_bytes'] + elements['inline_style_bytes']} bytes inline script/style, "
+              f"{elements['data_url_bytes']} bytes in {elements['data_urls']} data: URLs")
+    if summary['errors']:
+        print(f"❌ {len(summary['errors'])} files could not be analyzed")
+    save_report(report, output)
+    print(f"📄 Full report saved to {output}")
+    return 0
+
 def main():
     """Main function to run the analysis server"""
+    parser = argparse.ArgumentParser(description="Cochran Films platform analysis")
+    parser.add_argument('--tree', nargs='?', const='.', metavar='ROOT',
+                        help='analyze every HTML/JS/CSS file under ROOT (default .), save the report and exit')
+    parser.add_argument('--workers', type=int, default=None, help='processes for --tree (default: all cores)')
+    parser.add_argument('--output', default='platform-tree-report.json', help='where --tree saves its report')
+    parser.add_argument('--report', default='platform-analysis-report.json',
+                        help='where the startup analysis is saved')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'rescan every file instead of reusing unchanged results from {ANALYSIS_CACHE}')
+    parser.add_argument('--refresh-interval', type=float, default=REFRESH_INTERVAL_S,
+                        help='seconds before the served analysis is redone even if no file changed')
+    parser.add_argument('--watch-interval', type=float, default=WATCH_INTERVAL_S,
+                        help='seconds between checks of the analyzed files for changes')
+    args = parser.parse_args()
+    cache_path = None if args.no_cache else ANALYSIS_CACHE
+    if args.tree:
+        sys.exit(run_tree_report(args.tree, args.workers, args.output, cache_path))
+    
     print("🚀 Starting Cochran Films Platform Analysis Server...")
     print("=" * 60)
     
-    # Run initial analysis
-    analyzer = PlatformAnalyzer()
-    results = analyzer.run_comprehensive_analysis()
+    # Run initial analysis; the server keeps it up to date from here on
+    store = AnalysisStore('.', cache_path, args.refresh_interval, args.watch_interval)
+    results = store.refresh_now(verbose=True)
+    save_report(results, args.report)
+    if store.last_cache is not None:
+        print(f"♻️  {store.last_cache['unchanged']} files unchanged since the last run, {store.last_cache['rescanned']} rescanned")
+    print(f"📄 Report saved to {args.report}")
     
     # Print summary to console
     print("\n📊 ANALYSIS SUMMARY:")
@@ -789,18 +2004,25 @@ def main():
     print("📱 Open your browser and go to: http://localhost:8000")
     print("📊 View detailed analysis results in your browser")
     print("📥 Download JSON report from the web interface")
+    print("🌳 Per-file analysis of the whole tree (202 while it is first built): http://localhost:8000/api/analysis/tree")
+    print(f"🔁 Re-analyzed on file changes and every {args.refresh_interval:g}s: http://localhost:8000/api/analysis/status")
     print("\n⏹️  Press Ctrl+C to stop the server")
     print("=" * 60)
     
-    # Start HTTP server
+    # Start HTTP server; one thread per request, so a slow client never holds up the rest
     try:
-        with socketserver.TCPServer(("", 8000), AnalysisHTTPServer) as httpd:
+        with socketserver.ThreadingTCPServer(("", 8000), AnalysisHTTPServer) as httpd:
+            httpd.daemon_threads = True
+            httpd.store = store
+            store.start()
             print("✅ Server started successfully on port 8000")
             httpd.serve_forever()
     except KeyboardInterrupt:
         print("\n\n🛑 Server stopped by user")
     except Exception as e:
         print(f"\n❌ Server error: {e}")
+    finally:
+        store.stop()
 
 if __name__ == "__main__":
     main()
@@ -5,6 +5,7 @@ Embeds images as base64 and includes real links from the original HTML.
 """
 
 import os
+import shutil
 import subprocess
 import tempfile
 import base64
@@ -29,91 +30,128 @@ def image_to_base64(image_path):
         print(f"Warning: Could not convert {image_path} to base64: {e}")
         return None
 
-def create_pdf_version():
-    """Convert the HTML pitch deck to PDF using Chrome with embedded images and real links."""
-    
-    html_file = "Pitch.html"
-    pdf_file = "Pitch.pdf"
-    
-    if not os.path.exists(html_file):
-        print(f"Error: {html_file} not found!")
-        return False
-    
-    print("Converting HTML pitch deck to PDF with embedded images and real links...")
-    
-    # Convert images to base64
-    print("Converting images to base64...")
-    image_mappings = {
-        'Logo.png': 'logo_base64',
-        'Matthias Brown (TraceLoops) - Double Exposure.gif': 'slide1_bg',
-        'Din Perlis - Crash Zoom.gif': 'slide2_bg',
-        'Vincent Haycock - Echo print.gif': 'slide3_bg',
-        'Dave Meyers - Bolt Cam.gif': 'slide4_bg',
-        'Zac Dov Wiesel - Bolt Cam.gif': 'slide5_bg',
-        'Fixed Cam.gif': 'slide6_bg',
-        'Valentin Petit - Object Portal.gif': 'slide7_bg'
-    }
-    
+# Images embedded into the PDF, keyed by the placeholder they fill
+IMAGE_MAPPINGS = {
+    'Logo.png': 'logo_base64',
+    'Matthias Brown (TraceLoops) - Double Exposure.gif': 'slide1_bg',
+    'Din Perlis - Crash Zoom.gif': 'slide2_bg',
+    'Vincent Haycock - Echo print.gif': 'slide3_bg',
+    'Dave Meyers - Bolt Cam.gif': 'slide4_bg',
+    'Zac Dov Wiesel - Bolt Cam.gif': 'slide5_bg',
+    'Fixed Cam.gif': 'slide6_bg',
+    'Valentin Petit - Object Portal.gif': 'slide7_bg'
+}
+
+CHROME_CANDIDATES = [
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+]
+
+CHROME_PDF_FLAGS = [
+    '--headless',
+    '--disable-gpu',
+    '--no-sandbox',
+    '--print-to-pdf-no-header',
+    '--print-to-pdf-landscape',
+    '--disable-web-security',
+    '--allow-file-access-from-files',
+    '--disable-features=VizDisplayCompositor',
+]
+
+def find_chrome():
+    """Locate Chrome: $CHROME_PATH first, then the macOS app, then Chrome/Chromium on PATH."""
+    for candidate in [os.environ.get('CHROME_PATH')] + CHROME_CANDIDATES:
+        if not candidate:
+            continue
+        if os.path.isabs(candidate):
+            if os.path.exists(candidate):
+                return candidate
+        else:
+            found = shutil.which(candidate)
+            if found:
+                return found
+    return None
+
+def pipeline_inputs(base_dir="."):
+    """Every file the pitch PDF depends on: the source deck, its images and this template."""
+    inputs = [os.path.join(base_dir, "Pitch.html")]
+    inputs += [os.path.join(base_dir, image_file) for image_file in IMAGE_MAPPINGS]
+    inputs.append(os.path.abspath(__file__))
+    return inputs
+
+def collect_base64_images(base_dir=".", verbose=True):
+    """Read the slide images as data URLs, keyed by their placeholder."""
     base64_images = {}
-    for image_file, key in image_mappings.items():
-        if os.path.exists(image_file):
-            base64_data = image_to_base64(image_file)
+    for image_file, key in IMAGE_MAPPINGS.items():
+        image_path = os.path.join(base_dir, image_file)
+        if os.path.exists(image_path):
+            base64_data = image_to_base64(image_path)
             if base64_data:
                 base64_images[key] = base64_data
-                print(f"✅ Converted {image_file}")
-            else:
+                if verbose:
+                    print(f"✅ Converted {image_file}")
+            elif verbose:
                 print(f"❌ Failed to convert {image_file}")
-        else:
+        elif verbose:
             print(f"⚠️  Image not found: {image_file}")
-    
-    # Create a PDF-optimized HTML version with embedded images and real links
-    pdf_html = create_pdf_optimized_html(base64_images)
-    
+    return base64_images
+
+def render_html_to_pdf(html, pdf_file, chrome_path=None, timeout=120):
+    """Print an HTML string to pdf_file with headless Chrome. Returns (ok, error message)."""
+    chrome_path = chrome_path or find_chrome()
+    if not chrome_path:
+        return False, "Chrome not found (set CHROME_PATH)"
+
     # Write to temporary file
     with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False) as temp_html:
-        temp_html.write(pdf_html)
+        temp_html.write(html)
         temp_html_path = temp_html.name
-    
+
     try:
-        # Use Chrome to convert to PDF
-        chrome_path = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-        
-        if not os.path.exists(chrome_path):
-            print(f"Chrome not found at {chrome_path}")
-            return False
-        
         # Convert file path to URL
         html_url = f"file://{os.path.abspath(temp_html_path)}"
-        
-        cmd = [
-            chrome_path,
-            '--headless',
-            '--disable-gpu',
-            '--no-sandbox',
-            '--print-to-pdf-no-header',
-            f'--print-to-pdf={pdf_file}',
-            '--print-to-pdf-landscape',
-            '--disable-web-security',
-            '--allow-file-access-from-files',
-            '--disable-features=VizDisplayCompositor',
-            html_url
-        ]
-        
-        print("Running Chrome conversion with embedded images and real links...")
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
+        cmd = [chrome_path, *CHROME_PDF_FLAGS, f'--print-to-pdf={pdf_file}', html_url]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return False, f"Chrome did not finish within {timeout}s"
         if result.returncode == 0 and os.path.exists(pdf_file):
-            print(f"✅ Chrome conversion successful: {pdf_file}")
-            return True
-        else:
-            print(f"❌ Chrome conversion failed: {result.stderr}")
-            return False
-            
+            return True, ""
+        return False, result.stderr.strip() or f"Chrome exited with {result.returncode}"
     finally:
         # Clean up temporary file
         if os.path.exists(temp_html_path):
             os.unlink(temp_html_path)
 
+def create_pdf_version(pdf_file="Pitch.pdf", base_dir=".", chrome_path=None):
+    """Convert the HTML pitch deck to PDF using Chrome with embedded images and real links."""
+    
+    html_file = os.path.join(base_dir, "Pitch.html")
+    
+    if not os.path.exists(html_file):
+        print(f"Error: {html_file} not found!")
+        return False
+    
+    print("Converting HTML pitch deck to PDF with embedded images and real links...")
+    
+    # Convert images to base64
+    print("Converting images to base64...")
+    base64_images = collect_base64_images(base_dir)
+    
+    # Create a PDF-optimized HTML version with embedded images and real links
+    pdf_html = create_pdf_optimized_html(base64_images)
+    
+    print("Running Chrome conversion with embedded images and real links...")
+    ok, error = render_html_to_pdf(pdf_html, pdf_file, chrome_path)
+    if ok:
+        print(f"✅ Chrome conversion successful: {pdf_file}")
+        return True
+    print(f"❌ Chrome conversion failed: {error}")
+    return False
+
 def create_pdf_optimized_html(base64_images):
     """Create a PDF-optimized version of the HTML with embedded images and real links."""
     
@@ -484,6 +522,20 @@ def create_pdf_optimized_html(base64_images):
 </body>
 </html>"""
 
+def build_pitch_html(base_dir="."):
+    """PDF-ready pitch deck HTML, without the progress output."""
+    return create_pdf_optimized_html(collect_base64_images(base_dir, verbose=False))
+
+# Documents the pipeline can build on demand (used by https_server.py):
+# name -> output file name, input files, HTML builder
+DOCUMENTS = {
+    'pitch': {
+        'filename': 'Pitch.pdf',
+        'inputs': pipeline_inputs,
+        'html': build_pitch_html,
+    },
+}
+
 if __name__ == "__main__":
     print("🎬 Linked Cochran Films Pitch Deck PDF Converter")
     print("=" * 60)
@@ -8,8 +8,13 @@ Requirements:
 
 Usage:
   python3 scripts/e2e_full_suite.py --base https://collaborate.cochranfilms.com --admin info@cochranfilms.com --password "Cochranfilms2@"
+  python3 scripts/e2e_full_suite.py --mode browser ...   # full Chromium suite (nightly)
+  python3 scripts/e2e_full_suite.py --mode soak --iterations 50 ...   # heap/DOM/listener leak soak
+  python3 scripts/e2e_full_suite.py --mode browser --changed-since origin/main ...   # affected steps only
 
 Notes:
+  - The default --mode http is a browser-free smoke run of the applicant lifecycle over
+    pooled keep-alive connections; it is the pre-deploy gate and needs no Playwright.
   - This script does not create new HTML files; it uses the live pages.
   - It captures console logs and network statuses for each page.
   - It generates a unique test applicant name/email to avoid collisions and cleans up logically by archiving via admin flow.
@@ -17,13 +22,54 @@ Notes:
 from __future__ import annotations
 
 import argparse
+import base64
+import collections
+import fnmatch
+import http.client
 import json
+import math
+import os
+import ssl
+import subprocess
 import sys
+import threading
 import time
-from dataclasses import dataclass
-from typing import List, Dict, Any
+import urllib.parse
+import zipfile
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Tuple, Callable
 
-from playwright.sync_api import sync_playwright, Page, BrowserContext
+try:
+    from playwright.sync_api import sync_playwright, Page, BrowserContext
+except ImportError:  # HTTP smoke mode runs without a browser
+    sync_playwright = None
+
+
+@dataclass
+class Timeouts:
+    """Per-operation waits used by the browser steps; defaults are the historical fixed values."""
+    navigation_ms: int = 90_000
+    settle_ms: int = 15_000
+    selector_ms: int = 15_000
+    access_ms: int = 12_000
+    access_retry_ms: int = 8_000
+    contract_attempts: int = 5
+    contract_retry_wait_ms: int = 10_000
+    contract_retry_s: float | None = None  # no deadline beyond the attempts until a budget caps it
+
+    def capped(self, budget_s: float) -> Timeouts:
+        """Clamp every wait to a step budget so a hang fails within the budget, not minutes later."""
+        cap = int(budget_s * 1000)
+        return Timeouts(
+            navigation_ms=min(self.navigation_ms, cap),
+            settle_ms=min(self.settle_ms, cap),
+            selector_ms=min(self.selector_ms, cap),
+            access_ms=min(self.access_ms, cap),
+            access_retry_ms=min(self.access_retry_ms, cap),
+            contract_attempts=self.contract_attempts,
+            contract_retry_wait_ms=min(self.contract_retry_wait_ms, cap),
+            contract_retry_s=budget_s if self.contract_retry_s is None else min(self.contract_retry_s, budget_s),
+        )
 
 
 @dataclass
@@ -36,6 +82,159 @@ class TestContext:
     test_password: str
     job_title: str | None = None
     console_errors: List[str] = None
+    timings: List[Dict[str, Any]] = None
+    timeouts: Timeouts = field(default_factory=Timeouts)
+
+
+@dataclass(frozen=True)
+class DeviceProfile:
+    """Viewport plus CPU/network throttling applied over CDP to every page in a context."""
+    viewport: Tuple[int, int]
+    cpu_slowdown: float = 1.0
+    latency_ms: float = 0
+    download_kbps: float = -1   # -1 disables throttling
+    upload_kbps: float = -1
+    is_mobile: bool = False
+    device_scale_factor: float = 1.0
+
+
+DEVICE_PROFILES: Dict[str, DeviceProfile] = {
+    "desktop": DeviceProfile(viewport=(1280, 800)),
+    # Lighthouse's mobile defaults: mid-range phone, 4x CPU, slow 4G
+    "mid-phone-4g": DeviceProfile(viewport=(412, 915), cpu_slowdown=4, latency_ms=150,
+                                  download_kbps=1_600, upload_kbps=750, is_mobile=True, device_scale_factor=2.625),
+    "fast-phone-4g": DeviceProfile(viewport=(390, 844), cpu_slowdown=2, latency_ms=60,
+                                   download_kbps=9_000, upload_kbps=3_000, is_mobile=True, device_scale_factor=3),
+    "low-end-3g": DeviceProfile(viewport=(360, 640), cpu_slowdown=6, latency_ms=400,
+                                download_kbps=400, upload_kbps=400, is_mobile=True, device_scale_factor=2),
+}
+
+
+@dataclass
+class SuiteOptions:
+    """Optional instrumentation for the browser suite."""
+    coverage_out: str | None = None
+    iterations: int = 20
+    artifacts_dir: str = "e2e-artifacts"
+    profile: str = "desktop"
+    steps: List[str] | None = None   # None runs every browser step
+    trace_on_failure: bool = False
+
+
+class HttpResponse:
+    """Minimal stand-in for Playwright's APIResponse (status/ok/json/text)."""
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body or b"null")
+
+
+class KeepAliveClient:
+    """Pooled HTTP/1.1 keep-alive client exposing get/post/put like ``page.request``.
+
+    Idle connections are kept per origin and reused; a connection the server
+    closed underneath us is reopened and the request retried once.
+    """
+
+    def __init__(self, timeout: float = 30.0, max_idle_per_origin: int = 4):
+        self.timeout = timeout
+        self.max_idle_per_origin = max_idle_per_origin
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        # Mirror the browser context's ignore_https_errors=True for self-signed dev certs
+        self._ssl = ssl.create_default_context()
+        self._ssl.check_hostname = False
+        self._ssl.verify_mode = ssl.CERT_NONE
+
+    def _connect(self, origin: Tuple[str, str, int]) -> http.client.HTTPConnection:
+        scheme, host, port = origin
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self._ssl)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _acquire(self, origin: Tuple[str, str, int]) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            pool = self._idle.get(origin)
+            if pool:
+                return pool.pop(), True
+        return self._connect(origin), False
+
+    def _release(self, origin: Tuple[str, str, int], conn: http.client.HTTPConnection):
+        with self._lock:
+            pool = self._idle.setdefault(origin, [])
+            if len(pool) < self.max_idle_per_origin:
+                pool.append(conn)
+                return
+        conn.close()
+
+    def fetch(self, method: str, url: str, data: str | bytes | None = None,
+              headers: Dict[str, str] | None = None) -> HttpResponse:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or "http"
+        origin = (scheme, parts.hostname or "localhost", parts.port or (443 if scheme == "https" else 80))
+        target = parts.path or "/"
+        if parts.query:
+            target += f"?{parts.query}"
+        body = data.encode("utf-8") if isinstance(data, str) else data
+        hdrs = {"Connection": "keep-alive", **(headers or {})}
+
+        for attempt in range(2):
+            conn, reused = self._acquire(origin)
+            try:
+                conn.request(method, target, body=body, headers=hdrs)
+                resp = conn.getresponse()
+                payload = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # Stale pooled socket: retry once on a fresh connection
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(origin, conn)
+            return HttpResponse(resp.status, {k.lower(): v for k, v in resp.getheaders()}, payload)
+        raise RuntimeError(f"{method} {url} failed after retry")
+
+    def get(self, url: str, headers: Dict[str, str] | None = None) -> HttpResponse:
+        return self.fetch("GET", url, headers=headers)
+
+    def head(self, url: str, headers: Dict[str, str] | None = None) -> HttpResponse:
+        return self.fetch("HEAD", url, headers=headers)
+
+    def post(self, url: str, data: str | bytes | None = None, headers: Dict[str, str] | None = None) -> HttpResponse:
+        return self.fetch("POST", url, data=data, headers=headers)
+
+    def put(self, url: str, data: str | bytes | None = None, headers: Dict[str, str] | None = None) -> HttpResponse:
+        return self.fetch("PUT", url, data=data, headers=headers)
+
+    def close(self):
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for pool in pools.values():
+            for conn in pool:
+                conn.close()
+
+
+@dataclass
+class HttpSession:
+    """Browser-free counterpart of a Page for the API helpers: only ``.request`` is used."""
+    request: KeepAliveClient
 
 
 def _attach_console_collector(page: Page, ctx: TestContext, label: str):
@@ -54,31 +253,32 @@ def _attach_console_collector(page: Page, ctx: TestContext, label: str):
     page.on("console", _on_console)
 
 
-def _navigate(page: Page, url: str, label: str):
+def _navigate(page: Page, url: str, label: str, timeouts: Timeouts | None = None):
+    timeouts = timeouts or Timeouts()
     print(f"➡️  Navigating to {label}: {url}")
     resp = None
     try:
-        resp = page.goto(url, wait_until="domcontentloaded", timeout=90000)
+        resp = page.goto(url, wait_until="domcontentloaded", timeout=timeouts.navigation_ms)
     except Exception as e:
         # Fallback: try root path if index.html is slow to settle
         alt = url.replace("/index.html", "/")
         if alt != url:
             print(f"↩️  Fallback navigate to {alt}")
-            resp = page.goto(alt, wait_until="domcontentloaded", timeout=90000)
+            resp = page.goto(alt, wait_until="domcontentloaded", timeout=timeouts.navigation_ms)
     if not resp or (hasattr(resp, 'status') and resp.status and resp.status >= 400):
         raise RuntimeError(f"Failed to load {label} ({url}) status={getattr(resp, 'status', 'n/a')}")
     # Allow network to settle without blocking forever
     try:
-        page.wait_for_load_state("networkidle", timeout=15000)
+        page.wait_for_load_state("networkidle", timeout=timeouts.settle_ms)
     except Exception:
         pass
 
 
 def test_index(page: Page, ctx: TestContext):
     _attach_console_collector(page, ctx, "index")
-    _navigate(page, f"{ctx.base}/index.html", "index")
+    _navigate(page, f"{ctx.base}/index.html", "index", ctx.timeouts)
     # Wait for jobs section to attempt load; tolerate no jobs
-    page.wait_for_selector("#jobs", timeout=15000)
+    page.wait_for_selector("#jobs", timeout=ctx.timeouts.selector_ms)
     # Verify no fatal error overlay
     assert page.query_selector(".error-message") is not None
     print("✅ index.html loaded")
@@ -86,9 +286,9 @@ def test_index(page: Page, ctx: TestContext):
 
 def test_apply(page: Page, ctx: TestContext):
     _attach_console_collector(page, ctx, "apply")
-    _navigate(page, f"{ctx.base}/apply.html", "apply")
+    _navigate(page, f"{ctx.base}/apply.html", "apply", ctx.timeouts)
     # Populate job dropdown; if none, we still submit with minimal fields
-    page.wait_for_selector("#applyJobSelect", timeout=15000)
+    page.wait_for_selector("#applyJobSelect", timeout=ctx.timeouts.selector_ms)
     opts = page.query_selector_all("#applyJobSelect option")
     if len(opts) > 1:
         # choose the first real job (skip placeholder)
@@ -130,7 +330,7 @@ def test_apply(page: Page, ctx: TestContext):
     print("✅ apply.html submitted (continuing without toast assertion)")
 
 
-def api_create_firebase_user(page: Page, ctx: TestContext):
+def api_create_firebase_user(page: Page | HttpSession, ctx: TestContext):
     print("🧪 Creating Firebase user via API…")
     resp = page.request.post(f"{ctx.base}/api/firebase", data=json.dumps({
         "email": ctx.test_email,
@@ -141,9 +341,12 @@ def api_create_firebase_user(page: Page, ctx: TestContext):
     except Exception:
         payload = {"status": resp.status}
     print("🔎 /api/firebase response:", payload)
+    # Nothing later checks the Firebase user, so the HTTP gate fails here
+    if isinstance(page, HttpSession) and not resp.ok:
+        raise RuntimeError(f"POST /api/firebase -> {resp.status}")
 
 
-def api_upsert_user_approved(page: Page, ctx: TestContext):
+def api_upsert_user_approved(page: Page | HttpSession, ctx: TestContext):
     print("🧪 Upserting approved user into users.json via API…")
     # 1) GET current users
     u = page.request.get(f"{ctx.base}/api/users")
@@ -191,6 +394,8 @@ def api_upsert_user_approved(page: Page, ctx: TestContext):
         "action": "e2e-approve",
         "userName": ctx.test_name
     }), headers={"Content-Type": "application/json"})
+    if isinstance(page, HttpSession) and not r.ok:
+        raise RuntimeError(f"POST /api/update-users -> {r.status}")
     print("🔎 /api/update-users response:", r.json())
 
 
@@ -275,7 +480,7 @@ def _firebase_login(page: Page, email: str, password: str):
 
 def test_admin_approve(page: Page, ctx: TestContext):
     _attach_console_collector(page, ctx, "admin")
-    _navigate(page, f"{ctx.base}/admin-dashboard.html", "admin-dashboard")
+    _navigate(page, f"{ctx.base}/admin-dashboard.html", "admin-dashboard", ctx.timeouts)
 
     # If not already authenticated, try to sign in quickly.
     if page.query_selector("#loginScreen"):
@@ -297,7 +502,7 @@ def test_admin_approve(page: Page, ctx: TestContext):
 def fs_approve_user_via_admin(page: Page, ctx: TestContext):
     """Log into Firebase on admin dashboard and write approval+job directly to Firestore."""
     print("🧪 Approving via Firestore (admin-dashboard context)…")
-    _navigate(page, f"{ctx.base}/admin-dashboard.html", "admin-dashboard(firestore)")
+    _navigate(page, f"{ctx.base}/admin-dashboard.html", "admin-dashboard(firestore)", ctx.timeouts)
     # Ensure Firebase SDK is available and sign in
     login_js = (
         "async ({email, password}) => {\n"
@@ -345,7 +550,7 @@ def fs_approve_user_via_admin(page: Page, ctx: TestContext):
 
 def test_contract_sign(page: Page, ctx: TestContext):
     _attach_console_collector(page, ctx, "contract")
-    _navigate(page, f"{ctx.base}/contract.html", "contract")
+    _navigate(page, f"{ctx.base}/contract.html", "contract", ctx.timeouts)
     # Access check
     page.fill("#freelancerName", ctx.test_name)
     page.fill("#freelancerEmail", ctx.test_email)
@@ -353,23 +558,28 @@ def test_contract_sign(page: Page, ctx: TestContext):
     # Wait for success-message to be visible (not just present)
     appeared = False
     try:
-        page.wait_for_selector("#success-message:not(.hidden)", timeout=12000)
+        page.wait_for_selector("#success-message:not(.hidden)", timeout=ctx.timeouts.access_ms)
         appeared = True
     except Exception:
         appeared = False
-    # Retry loop up to ~60s if not yet visible
-    if not appeared:
-        for _ in range(5):
-            page.wait_for_timeout(10000)
-            try:
-                page.fill("#freelancerName", ctx.test_name)
-                page.fill("#freelancerEmail", ctx.test_email)
-                page.click("text=/Verify Access|Contract Access|Verify/i")
-                page.wait_for_selector("#success-message:not(.hidden)", timeout=8000)
-                appeared = True
-                break
-            except Exception:
-                continue
+    # Retry up to contract_attempts times (~60s by default), stopping early at a step budget
+    retry_s = ctx.timeouts.contract_retry_s
+    deadline = None if retry_s is None else time.monotonic() + retry_s
+    for _ in range(ctx.timeouts.contract_attempts):
+        if appeared or (deadline is not None and time.monotonic() >= deadline):
+            break
+        wait_ms = ctx.timeouts.contract_retry_wait_ms
+        if deadline is not None:
+            wait_ms = min(wait_ms, max(0, int((deadline - time.monotonic()) * 1000)))
+        page.wait_for_timeout(wait_ms)
+        try:
+            page.fill("#freelancerName", ctx.test_name)
+            page.fill("#freelancerEmail", ctx.test_email)
+            page.click("text=/Verify Access|Contract Access|Verify/i")
+            page.wait_for_selector("#success-message:not(.hidden)", timeout=ctx.timeouts.access_retry_ms)
+            appeared = True
+        except Exception:
+            continue
     # If success section appears, proceed to sign
     if appeared:
         # Set signature/password
@@ -378,7 +588,7 @@ def test_contract_sign(page: Page, ctx: TestContext):
         page.fill("#portalPassword", ctx.test_password)
         page.fill("#confirmPassword", ctx.test_password)
         # Enable button may be delayed by validation
-        page.wait_for_selector("#signContractBtn:not([disabled])", timeout=15000)
+        page.wait_for_selector("#signContractBtn:not([disabled])", timeout=ctx.timeouts.selector_ms)
         page.click("#signContractBtn")
         # Allow time for upload/emails
         page.wait_for_timeout(5000)
@@ -393,12 +603,12 @@ def test_contract_sign(page: Page, ctx: TestContext):
             page.fill("#freelancerEmail", ctx.test_email)
             page.click("text=/Verify Access|Contract Access|Verify/i")
             try:
-                page.wait_for_selector("#success-message:not(.hidden)", timeout=12000)
+                page.wait_for_selector("#success-message:not(.hidden)", timeout=ctx.timeouts.access_ms)
                 page.fill("#digitalSignature", ctx.test_name)
                 page.fill("#signatureDate", time.strftime("%Y-%m-%d"))
                 page.fill("#portalPassword", ctx.test_password)
                 page.fill("#confirmPassword", ctx.test_password)
-                page.wait_for_selector("#signContractBtn:not([disabled])", timeout=15000)
+                page.wait_for_selector("#signContractBtn:not([disabled])", timeout=ctx.timeouts.selector_ms)
                 page.click("#signContractBtn")
                 page.wait_for_timeout(5000)
                 print("✅ contract signed after GitHub approval")
@@ -409,23 +619,26 @@ def test_contract_sign(page: Page, ctx: TestContext):
             print("⚠️ GitHub users.json approval update failed:", e)
 
 
-def _get_json(page: Page, url: str) -> Dict[str, Any]:
+def _get_json(page: Page | HttpSession, url: str) -> Dict[str, Any]:
     resp = page.request.get(url)
     if not resp.ok:
         raise RuntimeError(f"GET {url} -> {resp.status}")
     return resp.json()
 
 
-def test_portal(page: Page, ctx: TestContext):
-    _attach_console_collector(page, ctx, "portal")
-    _navigate(page, f"{ctx.base}/user-portal.html", "user-portal")
-    # Login
-    page.wait_for_selector("#email", timeout=15000)
+def _portal_login(page: Page, ctx: TestContext):
+    page.wait_for_selector("#email", timeout=ctx.timeouts.selector_ms)
     page.fill("#email", ctx.test_email)
     page.fill("#password", ctx.test_password)
     page.click("#loginForm button[type='submit']")
     # Wait for portal
     page.wait_for_timeout(4000)
+
+
+def test_portal(page: Page, ctx: TestContext):
+    _attach_console_collector(page, ctx, "portal")
+    _navigate(page, f"{ctx.base}/user-portal.html", "user-portal", ctx.timeouts)
+    _portal_login(page, ctx)
     # Check role/location/rate fields anywhere visible
     body_text = page.inner_text("body")
     assert "Role" in body_text, "Role label missing"
@@ -434,38 +647,669 @@ def test_portal(page: Page, ctx: TestContext):
     print("✅ user-portal basic fields present")
 
 
-def run_suite(ctx: TestContext) -> int:
+def http_check_pages(session: HttpSession, ctx: TestContext):
+    for path in ("index.html", "apply.html", "contract.html", "user-portal.html"):
+        resp = session.request.get(f"{ctx.base}/{path}")
+        if not resp.ok:
+            raise RuntimeError(f"GET /{path} -> {resp.status}")
+    print("✅ pages reachable (index, apply, contract, portal)")
+
+
+def _find_user(users: Dict[str, Any], name: str) -> Tuple[str | None, Dict[str, Any]]:
+    # Same case-insensitive name lookup contract.html performs
+    key = next((k for k in users if k.lower() == name.lower()), None)
+    return key, users.get(key) or {}
+
+
+def http_verify_contract_access(session: HttpSession, ctx: TestContext):
+    """Check the data contract.html's access gate relies on (name + email match, approved)."""
+    users = _get_json(session, f"{ctx.base}/api/users").get("users", {})
+    key, entry = _find_user(users, ctx.test_name)
+    if not key:
+        raise RuntimeError(f"contract access: {ctx.test_name} not in users")
+    email = (entry.get("profile", {}).get("email") or "").lower()
+    if email != ctx.test_email.lower():
+        raise RuntimeError(f"contract access: email mismatch ({email!r} != {ctx.test_email!r})")
+    if entry.get("application", {}).get("status") != "approved":
+        raise RuntimeError("contract access: application not approved")
+    print("✅ contract access data verified")
+
+
+def http_verify_portal_data(session: HttpSession, ctx: TestContext):
+    """Check the Role/Location/Rate fields user-portal.html renders for the primary job."""
+    users = _get_json(session, f"{ctx.base}/api/users").get("users", {})
+    _, entry = _find_user(users, ctx.test_name)
+    profile = entry.get("profile", {})
+    job = entry.get("jobs", {}).get(entry.get("primaryJob") or "", {})
+    fields = {
+        "Role": job.get("title") or profile.get("role"),
+        "Location": job.get("location") or profile.get("location"),
+        "Rate": job.get("pay") or job.get("rate") or profile.get("rate"),
+    }
+    missing = [label for label, value in fields.items() if not value]
+    assert not missing, f"portal data missing: {', '.join(missing)}"
+    print("✅ user-portal data present")
+
+
+def run_http_suite(ctx: TestContext) -> int:
+    """Browser-free smoke run of the applicant lifecycle; the default pre-deploy gate."""
+    started = time.perf_counter()
+    session = HttpSession(request=KeepAliveClient())
+    if ctx.job_title is None:
+        ctx.job_title = "Contractor"
+    try:
+        http_check_pages(session, ctx)
+        api_create_firebase_user(session, ctx)
+        api_upsert_user_approved(session, ctx)
+        http_verify_contract_access(session, ctx)
+        http_verify_portal_data(session, ctx)
+    finally:
+        session.request.close()
+    print(f"🏁 HTTP smoke suite passed in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+class CoverageCollector:
+    """Precise JS block coverage and CSS rule usage over CDP, aggregated across steps.
+
+    Playwright's Python API has no ``page.coverage``, so this drives the Profiler
+    and CSS domains directly. Inline ``<script>``/``<style>`` blocks are keyed by
+    URL plus start line so the same block is merged across navigations.
+    """
+
+    def __init__(self, context: BrowserContext, page: Page, base: str):
+        self.base = base
+        self.cdp = context.new_cdp_session(page)
+        self._scripts: Dict[str, Tuple[str, int]] = {}   # scriptId -> (key, length)
+        self._sheets: Dict[str, Tuple[str, int]] = {}    # styleSheetId -> (key, length)
+        self.js: Dict[str, bytearray] = {}               # key -> used-byte mask
+        self.css: Dict[str, bytearray] = {}
+        self.steps: Dict[str, set] = {}                  # key -> steps that loaded it
+        self._new_sheets: set = set()                    # sheet keys added since last collect
+        self.cdp.on("Debugger.scriptParsed", self._on_script)
+        self.cdp.on("CSS.styleSheetAdded", self._on_sheet)
+        self.cdp.send("Debugger.enable")
+        self.cdp.send("Profiler.enable")
+        self.cdp.send("Profiler.startPreciseCoverage", {"callCount": False, "detailed": True})
+        self.cdp.send("DOM.enable")
+        self.cdp.send("CSS.enable")
+        self.cdp.send("CSS.startRuleUsageTracking")
+
+    def _key(self, url: str, line: int) -> str:
+        url = url.replace(self.base, "") or url
+        return f"{url}#L{line + 1}" if line else url
+
+    def _on_script(self, ev: Dict[str, Any]):
+        if ev.get("url", "").startswith("http"):
+            self._scripts[ev["scriptId"]] = (self._key(ev["url"], ev.get("startLine", 0)), ev.get("length", 0))
+
+    def _on_sheet(self, ev: Dict[str, Any]):
+        h = ev["header"]
+        if h.get("sourceURL", "").startswith("http"):
+            key = self._key(h["sourceURL"], h.get("startLine", 0))
+            self._sheets[h["styleSheetId"]] = (key, int(h.get("length", 0)))
+            self._new_sheets.add(key)
+
+    @staticmethod
+    def _merge(masks: Dict[str, bytearray], key: str, used: bytearray):
+        prev = masks.get(key)
+        if prev is not None and len(prev) == len(used):
+            merged = int.from_bytes(prev, "little") | int.from_bytes(used, "little")
+            used = bytearray(merged.to_bytes(len(used), "little"))
+        masks[key] = used
+
+    def collect(self, step: str):
+        """Fold coverage gathered since the last call into the aggregate."""
+        for entry in self.cdp.send("Profiler.takePreciseCoverage")["result"]:
+            key, length = self._scripts.get(entry["scriptId"], (None, 0))
+            if key is None:
+                continue
+            ranges = [r for fn in entry["functions"] for r in fn["ranges"]]
+            length = length or max((r["endOffset"] for r in ranges), default=0)
+            used = bytearray(length)
+            # Nested block ranges refine their parents: apply outermost first
+            for r in sorted(ranges, key=lambda r: (r["startOffset"], -r["endOffset"])):
+                start, end = r["startOffset"], min(r["endOffset"], length)
+                used[start:end] = (b"\x01" if r["count"] else b"\x00") * (end - start)
+            self._merge(self.js, key, used)
+            self.steps.setdefault(key, set()).add(step)
+        per_sheet: Dict[str, bytearray] = {}
+        for rule in self.cdp.send("CSS.takeCoverageDelta")["coverage"]:
+            key, length = self._sheets.get(rule["styleSheetId"], (None, 0))
+            if key is None or not rule["used"]:
+                continue
+            used = per_sheet.setdefault(key, bytearray(length))
+            start, end = int(rule["startOffset"]), min(int(rule["endOffset"]), length)
+            used[start:end] = b"\x01" * (end - start)
+        lengths = dict(self._sheets.values())
+        for key in self._new_sheets | per_sheet.keys():
+            self._merge(self.css, key, per_sheet.get(key) or bytearray(lengths[key]))
+            self.steps.setdefault(key, set()).add(step)
+        self._new_sheets.clear()
+
+    def report(self, out_path: str):
+        rows = []
+        for kind, masks in (("js", self.js), ("css", self.css)):
+            for key, mask in masks.items():
+                total = len(mask)
+                used = mask.count(1)
+                rows.append({
+                    "type": kind,
+                    "block": key,
+                    "total_bytes": total,
+                    "used_bytes": used,
+                    "unused_bytes": total - used,
+                    "unused_pct": round(100.0 * (total - used) / total, 1) if total else 0.0,
+                    "steps": sorted(self.steps.get(key, ())),
+                })
+        rows.sort(key=lambda r: r["unused_bytes"], reverse=True)
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump({"generated": time.strftime("%Y-%m-%dT%H:%M:%S"), "blocks": rows}, f, indent=2)
+        print("\n=== Coverage: unused bytes per script/stylesheet block ===")
+        for r in rows[:20]:
+            print(f"{r['type']:>3}  {r['unused_bytes']:>9,} / {r['total_bytes']:>9,} unused ({r['unused_pct']:>5}%)  {r['block']}")
+        print(f"📄 Coverage report written to {out_path}")
+
+
+class FlightRecorder:
+    """Rolling in-memory buffer of recent frames, DOM snapshots, network and console events.
+
+    Nothing touches disk unless a step fails: ``flush`` then writes the buffer
+    (plus a final screenshot and DOM) to a zip under the artifacts directory.
+    Frames come from CDP screencast, which only emits on repaint, so a passing
+    run pays for little more than appending to a few deques.
+    """
+
+    def __init__(self, context: BrowserContext, page: Page, max_frames: int = 20,
+                 max_events: int = 300, max_snapshots: int = 5):
+        self.page = page
+        self.frames: collections.deque = collections.deque(maxlen=max_frames)
+        self.events: collections.deque = collections.deque(maxlen=max_events)
+        self.snapshots: collections.deque = collections.deque(maxlen=max_snapshots)
+        context.on("request", lambda r: self._event("request", method=r.method, url=r.url))
+        context.on("response", lambda r: self._event("response", status=r.status, url=r.url))
+        context.on("requestfailed", lambda r: self._event("requestfailed", url=r.url, error=r.failure))
+        page.on("console", lambda m: self._event("console", level=m.type, text=m.text))
+        page.on("pageerror", lambda e: self._event("pageerror", text=str(e)))
+        self.cdp = context.new_cdp_session(page)
+        self.cdp.on("Page.screencastFrame", self._on_frame)
+        self.cdp.send("Page.startScreencast", {"format": "jpeg", "quality": 40,
+                                               "maxWidth": 800, "maxHeight": 800, "everyNthFrame": 2})
+
+    def _event(self, kind: str, **data: Any):
+        self.events.append({"t": round(time.time(), 3), "type": kind, **data})
+
+    def _on_frame(self, ev: Dict[str, Any]):
+        self.frames.append((ev["metadata"].get("timestamp", time.time()), ev["data"]))
+        try:
+            self.cdp.send("Page.screencastFrameAck", {"sessionId": ev["sessionId"]})
+        except Exception:
+            pass
+
+    def checkpoint(self, label: str):
+        """Keep a DOM snapshot at a step boundary."""
+        try:
+            self.snapshots.append((label, self.page.url, self.page.content()))
+        except Exception:
+            pass
+
+    def flush(self, step: str, error: BaseException, out_dir: str) -> str:
+        self.checkpoint(f"{step}-failure")
+        try:
+            final_png = self.page.screenshot(full_page=True)
+        except Exception:
+            final_png = None
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, f"trace-{step}-{time.strftime('%Y%m%d-%H%M%S')}.zip")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr("error.txt", f"{type(error).__name__}: {error}\nstep: {step}\nurl: {self.page.url}\n")
+            z.writestr("events.json", json.dumps(list(self.events), indent=2))
+            for i, (ts, data) in enumerate(self.frames):
+                z.writestr(f"frames/{i:03d}-{ts:.3f}.jpg", base64.b64decode(data))
+            for i, (label, url, dom) in enumerate(self.snapshots):
+                z.writestr(f"dom/{i:02d}-{label}.html", f"<!-- {url} -->\n{dom}")
+            if final_png:
+                z.writestr("final.png", final_png)
+        print(f"🧳 Failure trace for '{step}' written to {path}")
+        return path
+
+
+# Ordered browser steps; each takes (page, ctx)
+BROWSER_STEPS: List[Tuple[str, Callable[[Page, TestContext], None]]] = [
+    ("index", test_index),
+    ("apply", test_apply),
+    # Ensure Firebase account exists for portal login
+    ("firebase_user", api_create_firebase_user),
+    # Prefer Firestore approval directly from admin context
+    ("approve", fs_approve_user_via_admin),
+    ("contract", test_contract_sign),
+    ("portal", test_portal),
+]
+
+# Steps whose ctx/backend state a step depends on (apply sets job_title, approve grants access, ...)
+STEP_PREREQUISITES: Dict[str, List[str]] = {
+    "index": [],
+    "apply": [],
+    "firebase_user": [],
+    "approve": ["apply"],
+    "contract": ["approve"],
+    "portal": ["firebase_user", "approve"],
+}
+
+# Site files (relative to the site root, fnmatch patterns) exercised by each step
+STEP_TRIGGERS: Dict[str, List[str]] = {
+    "index": ["index.html", "api/jobs-data.js", "firestore-integration.js"],
+    "apply": ["apply.html", "styles/apply.css", "api/apply.js", "api/jobs-data.js",
+              "api/dropdown-options.js", "dropdown-options.json"],
+    "firebase_user": ["api/firebase.js"],
+    "approve": ["admin-dashboard.html", "admin-dashboard-modular/css/*", "admin-bank-viewer.js",
+                "api/update-users.js", "api/users.js"],
+    "contract": ["contract.html", "storage-utils.js", "api/users.js", "api/update-users.js",
+                 "api/notifications.js", "api/contracts.js", "api/github/*", "uploaded-contracts.json"],
+    "portal": ["user-portal.html", "storage-utils.js", "bank-details-modal.js", "messaging-service.js",
+               "secure-bank-storage.js", "firestore-integration.js", "api/users.js", "api/notifications.js",
+               "api/contracts.js"],
+}
+
+# Shared plumbing: a change here selects every step
+RUN_ALL_TRIGGERS = ["firebase-config.js", "firestore-data-manager.js", "firestore.rules", "vercel.json",
+                    "package.json", "server.js", "scripts/e2e_full_suite.py"]
+
+SITE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def changed_files(since: str) -> List[str]:
+    """Files changed relative to `since` (committed, staged, unstaged and untracked), site-root relative."""
+    def git(*args: str) -> List[str]:
+        out = subprocess.run(["git", *args], cwd=SITE_ROOT, check=True, capture_output=True, text=True).stdout
+        return [line for line in out.splitlines() if line]
+    return sorted(set(git("diff", "--name-only", "--relative", since, "--", "."))
+                  | set(git("ls-files", "--others", "--exclude-standard")))
+
+
+def _matches(path: str, patterns: List[str]) -> bool:
+    return any(fnmatch.fnmatch(path, pat) for pat in patterns)
+
+
+def select_steps(changed: List[str]) -> Tuple[List[str], Dict[str, str]]:
+    """Return (steps to run in suite order, reason per step) for a set of changed files."""
+    order = [name for name, _ in BROWSER_STEPS]
+    run_all = [f for f in changed if _matches(f, RUN_ALL_TRIGGERS)]
+    if run_all:
+        return order, {name: f"shared file changed: {run_all[0]}" for name in order}
+    reasons: Dict[str, str] = {}
+    for name in order:
+        hits = [f for f in changed if _matches(f, STEP_TRIGGERS.get(name, []))]
+        if hits:
+            reasons[name] = "changed: " + ", ".join(hits[:3]) + (" …" if len(hits) > 3 else "")
+    pending = list(reasons)
+    while pending:
+        name = pending.pop()
+        for dep in STEP_PREREQUISITES.get(name, []):
+            if dep not in reasons:
+                reasons[dep] = f"prerequisite of {name}"
+                pending.append(dep)
+    return [name for name in order if name in reasons], reasons
+
+
+def print_selection(changed: List[str], selected: List[str], reasons: Dict[str, str]):
+    print(f"🧭 {len(changed)} changed file(s); running {len(selected)}/{len(BROWSER_STEPS)} steps")
+    for name, _ in BROWSER_STEPS:
+        if name in selected:
+            print(f"  ▶️  {name:<14} {reasons[name]}")
+        else:
+            print(f"  ⏭️  {name:<14} skipped: none of its pages/handlers changed")
+    mapped = list(set(RUN_ALL_TRIGGERS).union(*STEP_TRIGGERS.values()))
+    unmapped = [f for f in changed if not _matches(f, mapped)]
+    if unmapped:
+        print("  ℹ️  not covered by any step: " + ", ".join(unmapped[:10]) + (" …" if len(unmapped) > 10 else ""))
+
+
+def _apply_throttling(context: BrowserContext, page: Page, profile: DeviceProfile):
+    if profile.cpu_slowdown == 1 and profile.latency_ms == 0 and profile.download_kbps < 0:
+        return
+    cdp = context.new_cdp_session(page)
+    cdp.send("Emulation.setCPUThrottlingRate", {"rate": profile.cpu_slowdown})
+    cdp.send("Network.enable")
+    # CDP wants bytes/second; -1 leaves that direction unthrottled
+    cdp.send("Network.emulateNetworkConditions", {
+        "offline": False,
+        "latency": profile.latency_ms,
+        "downloadThroughput": profile.download_kbps * 125 if profile.download_kbps > 0 else -1,
+        "uploadThroughput": profile.upload_kbps * 125 if profile.upload_kbps > 0 else -1,
+    })
+
+
+_NAV_TIMING_JS = """() => {
+  const n = performance.getEntriesByType('navigation')[0];
+  if (!n) return null;
+  const fcp = performance.getEntriesByName('first-contentful-paint')[0];
+  return { page: location.pathname, origin: performance.timeOrigin, ttfb: n.responseStart,
+           fcp: fcp ? fcp.startTime : null, dcl: n.domContentLoadedEventEnd, load: n.loadEventEnd,
+           transfer: n.transferSize };
+}"""
+
+
+def _record_timing(page: Page, ctx: TestContext, profile: str, step: str, duration_s: float, last_origin: List[float]):
+    """Append step wall time and, if the step loaded a new document, its navigation timing."""
+    row: Dict[str, Any] = {"profile": profile, "step": step, "duration_ms": round(duration_s * 1000)}
+    try:
+        nav = page.evaluate(_NAV_TIMING_JS)
+    except Exception:
+        nav = None
+    if nav:
+        origin = nav.pop("origin")
+        if origin not in last_origin:
+            last_origin[:] = [origin]
+            row.update({k: (round(v) if isinstance(v, float) else v) for k, v in nav.items()})
+    ctx.timings.append(row)
+
+
+def print_timing_report(ctx: TestContext, out_path: str | None = None):
+    rows = ctx.timings or []
+    profiles = list(dict.fromkeys(r["profile"] for r in rows))
+    print("\n=== Timing report (ms) ===")
+    for profile in profiles:
+        print(f"[{profile}]")
+        print(f"  {'step':<14} {'total':>8} {'ttfb':>7} {'fcp':>7} {'dcl':>7} {'load':>7}  page")
+        for r in (r for r in rows if r["profile"] == profile):
+            cells = [r.get(k) for k in ("ttfb", "fcp", "dcl", "load")]
+            cells = [f"{c:>7}" if c is not None else f"{'-':>7}" for c in cells]
+            print(f"  {r['step']:<14} {r['duration_ms']:>8} {' '.join(cells)}  {r.get('page', '')}")
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"📄 Timing report written to {out_path}")
+
+
+class StepHistory:
+    """Persisted per-step durations of successful runs, used to derive step budgets.
+
+    Until a step has MIN_SAMPLES runs it gets no budget and the fixed Timeouts
+    defaults apply. After that the budget is p99 plus headroom.
+    """
+
+    MIN_SAMPLES = 5
+    MAX_SAMPLES = 50
+    HEADROOM = 1.5
+    MIN_SLACK_S = 10.0
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.data: Dict[str, List[float]] = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+
+    @staticmethod
+    def percentile(values: List[float], pct: float) -> float:
+        ordered = sorted(values)
+        # Nearest-rank percentile
+        rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def p99(self, key: str) -> float | None:
+        values = self.data.get(key, [])
+        return self.percentile(values, 99) if len(values) >= self.MIN_SAMPLES else None
+
+    def budget(self, key: str) -> float | None:
+        p99 = self.p99(key)
+        return None if p99 is None else max(p99 * self.HEADROOM, p99 + self.MIN_SLACK_S)
+
+    def record(self, key: str, seconds: float):
+        values = self.data.setdefault(key, [])
+        values.append(round(seconds, 3))
+        del values[:-self.MAX_SAMPLES]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+
+
+def _slow_step_message(name: str, elapsed: float, p99: float, budget: float) -> str:
+    return (f"⏱️ step '{name}' took {elapsed:.1f}s, slower than p99 ({p99:.1f}s) by {elapsed - p99:.1f}s "
+            f"(budget {budget:.1f}s)")
+
+
+def run_suite(ctx: TestContext, opts: SuiteOptions | None = None) -> int:
+    if sync_playwright is None:
+        raise RuntimeError("Browser mode requires Playwright: pip install playwright && playwright install chromium")
+    opts = opts or SuiteOptions()
+    profile = DEVICE_PROFILES[opts.profile]
+    if ctx.timings is None:
+        ctx.timings = []
+    history = StepHistory(os.path.join(opts.artifacts_dir, "step-history.json"))
+    defaults = ctx.timeouts
     with sync_playwright() as pw:
         browser = pw.chromium.launch(headless=True)
-        context: BrowserContext = browser.new_context(ignore_https_errors=True)
+        context: BrowserContext = browser.new_context(
+            ignore_https_errors=True,
+            viewport={"width": profile.viewport[0], "height": profile.viewport[1]},
+            is_mobile=profile.is_mobile,
+            has_touch=profile.is_mobile,
+            device_scale_factor=profile.device_scale_factor,
+        )
         context.set_default_navigation_timeout(120_000)
+        context.on("page", lambda p: _apply_throttling(context, p, profile))
         page = context.new_page()
+        coverage = CoverageCollector(context, page, ctx.base) if opts.coverage_out else None
+        recorder = FlightRecorder(context, page) if opts.trace_on_failure else None
+        last_origin: List[float] = []
         try:
-            test_index(page, ctx)
-            test_apply(page, ctx)
-            # Ensure Firebase account exists for portal login
-            api_create_firebase_user(page, ctx)
-            # Prefer Firestore approval directly from admin context
-            fs_approve_user_via_admin(page, ctx)
-            test_contract_sign(page, ctx)
-            test_portal(page, ctx)
+            for name, step in BROWSER_STEPS:
+                if opts.steps is not None and name not in opts.steps:
+                    continue
+                key = f"{opts.profile}:{name}"
+                budget, p99 = history.budget(key), history.p99(key)
+                ctx.timeouts = defaults.capped(budget) if budget else defaults
+                if budget:
+                    context.set_default_timeout(min(30_000, ctx.timeouts.selector_ms))
+                    context.set_default_navigation_timeout(min(120_000, ctx.timeouts.navigation_ms))
+                else:
+                    # Not enough history yet: Playwright's own 30s and the suite's 120s
+                    context.set_default_timeout(30_000)
+                    context.set_default_navigation_timeout(120_000)
+                started = time.perf_counter()
+                try:
+                    step(page, ctx)
+                except Exception as e:
+                    elapsed = time.perf_counter() - started
+                    if recorder:
+                        recorder.flush(f"{opts.profile}-{name}", e, opts.artifacts_dir)
+                    if budget and elapsed > p99:
+                        # The step's own failure stays the error; the overrun is context for it
+                        note = _slow_step_message(name, elapsed, p99, budget)
+                        if hasattr(e, "add_note"):
+                            e.add_note(note)
+                        else:
+                            print(note)
+                    raise
+                finally:
+                    elapsed = time.perf_counter() - started
+                    _record_timing(page, ctx, opts.profile, name, elapsed, last_origin)
+                    if coverage:
+                        coverage.collect(name)
+                if budget and elapsed > budget:
+                    error = RuntimeError(_slow_step_message(name, elapsed, p99, budget))
+                    if recorder:
+                        recorder.flush(f"{opts.profile}-{name}", error, opts.artifacts_dir)
+                    raise error
+                if recorder:
+                    recorder.checkpoint(name)
+                history.record(key, elapsed)
         finally:
+            ctx.timeouts = defaults
+            history.save()
             # Dump console errors if any
             if ctx.console_errors:
                 print("\n=== Console errors captured ===")
                 for e in ctx.console_errors:
                     print(e)
+            if coverage:
+                coverage.report(opts.coverage_out)
+            context.close()
+            browser.close()
+    return 0
+
+
+def _admin_login(page: Page, ctx: TestContext):
+    if page.query_selector("#loginScreen"):
+        _firebase_login(page, ctx.admin_email, ctx.admin_password)
+
+
+# (label, page, login) targets for the soak run; both pages expose a global logout()
+SOAK_TARGETS = [
+    ("portal", "user-portal.html", _portal_login),
+    ("admin", "admin-dashboard.html", _admin_login),
+]
+SOAK_CLICK_SELECTORS = ".nav-link, .tab-button, .job-tab"
+
+
+class MemorySampler:
+    """Post-GC JS heap and DOM/listener counters for one page via CDP."""
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self.cdp = context.new_cdp_session(page)
+        self.cdp.send("HeapProfiler.enable")
+        self.samples: List[Dict[str, int]] = []
+
+    def sample(self) -> Dict[str, int]:
+        self.cdp.send("HeapProfiler.collectGarbage")
+        heap = self.cdp.send("Runtime.getHeapUsage")
+        counters = self.cdp.send("Memory.getDOMCounters")
+        entry = {
+            "heap_used": int(heap["usedSize"]),
+            "nodes": counters["nodes"],
+            "listeners": counters["jsEventListeners"],
+            "documents": counters["documents"],
+        }
+        self.samples.append(entry)
+        return entry
+
+    def snapshot(self, path: str):
+        chunks: List[str] = []
+
+        def handler(ev):
+            chunks.append(ev["chunk"])
+
+        self.cdp.on("HeapProfiler.addHeapSnapshotChunk", handler)
+        try:
+            self.cdp.send("HeapProfiler.takeHeapSnapshot", {"reportProgress": False})
+        finally:
+            self.cdp.remove_listener("HeapProfiler.addHeapSnapshotChunk", handler)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("".join(chunks))
+        print(f"📸 Heap snapshot saved: {path}")
+
+
+def _is_monotonic_growth(values: List[int], min_growth: float) -> bool:
+    """True if a series (after the warm-up sample) mostly rises and grows by more than min_growth."""
+    series = values[1:]
+    if len(series) < 3:
+        return False
+    deltas = [b - a for a, b in zip(series, series[1:])]
+    rising = sum(1 for d in deltas if d > 0)
+    falling = sum(1 for d in deltas if d < 0)
+    return rising >= 0.8 * len(deltas) and falling <= 1 and series[-1] - series[0] > min_growth
+
+
+def _exercise(page: Page):
+    """Click through in-app navigation the way a long-lived tab would be used."""
+    for el in page.query_selector_all(SOAK_CLICK_SELECTORS):
+        try:
+            if el.is_visible():
+                el.click(timeout=2000)
+                page.wait_for_timeout(300)
+        except Exception:
+            pass
+
+
+def run_soak(ctx: TestContext, opts: SuiteOptions) -> int:
+    """Repeatedly log in, exercise and log out of the portal and admin dashboard, watching for leaks."""
+    if sync_playwright is None:
+        raise RuntimeError("Soak mode requires Playwright: pip install playwright && playwright install chromium")
+    os.makedirs(opts.artifacts_dir, exist_ok=True)
+    leaks: List[str] = []
+    report: Dict[str, Any] = {}
+    with sync_playwright() as pw:
+        browser = pw.chromium.launch(headless=True)
+        context: BrowserContext = browser.new_context(ignore_https_errors=True)
+        context.set_default_navigation_timeout(120_000)
+        try:
+            # Portal login needs the throwaway account to exist
+            setup = context.new_page()
+            api_create_firebase_user(setup, ctx)
+            setup.close()
+            for label, path, login in SOAK_TARGETS:
+                page = context.new_page()
+                _attach_console_collector(page, ctx, f"soak:{label}")
+                sampler = MemorySampler(context, page)
+                _navigate(page, f"{ctx.base}/{path}", label, ctx.timeouts)
+                for i in range(opts.iterations):
+                    try:
+                        login(page, ctx)
+                        _exercise(page)
+                        page.evaluate("async () => { if (typeof logout === 'function') await logout(); }")
+                        page.wait_for_timeout(500)
+                    except Exception as e:
+                        print(f"⚠️ [{label}] iteration {i + 1} error: {e}")
+                    s = sampler.sample()
+                    if i == 0:
+                        sampler.snapshot(os.path.join(opts.artifacts_dir, f"{label}-start.heapsnapshot"))
+                    print(f"🔁 [{label}] {i + 1}/{opts.iterations} heap={s['heap_used'] / 1e6:.1f}MB "
+                          f"nodes={s['nodes']} listeners={s['listeners']} documents={s['documents']}")
+                sampler.snapshot(os.path.join(opts.artifacts_dir, f"{label}-end.heapsnapshot"))
+                series = {k: [s[k] for s in sampler.samples] for k in sampler.samples[0]}
+                flagged = [k for k, v in series.items()
+                           if _is_monotonic_growth(v, 0.01 * v[0] if k == "heap_used" else 0)]
+                leaks += [f"{label}:{k}" for k in flagged]
+                report[label] = {"samples": sampler.samples, "monotonic_growth": flagged}
+                page.close()
+        finally:
             context.close()
             browser.close()
+    out = os.path.join(opts.artifacts_dir, "soak-report.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Soak report written to {out}")
+    if leaks:
+        print("⚠️ Monotonic growth (possible leak): " + ", ".join(leaks))
+        return 1
+    print("✅ No monotonic heap/DOM/listener growth detected")
     return 0
 
 
+def _positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {n}")
+    return n
+
+
 def main(argv: List[str]) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("--base", default="http://localhost:3000", help="Base URL for the site")
     parser.add_argument("--admin", default="info@cochranfilms.com")
     parser.add_argument("--password", default="Cochranfilms2@")
+    parser.add_argument("--mode", choices=("http", "browser", "soak"), default="http",
+                        help="http: browser-free API smoke gate (default); browser: full Chromium suite; "
+                             "soak: memory-leak soak of user-portal and admin-dashboard")
+    parser.add_argument("--iterations", type=_positive_int, default=20, help="soak mode: login/exercise/logout cycles per page")
+    parser.add_argument("--artifacts", default="e2e-artifacts", help="directory for heap snapshots and reports")
+    parser.add_argument("--profile", action="append", choices=sorted(DEVICE_PROFILES), metavar="NAME",
+                        help=f"browser mode: device/throttling profile, repeatable ({', '.join(DEVICE_PROFILES)}); "
+                             "default desktop")
+    parser.add_argument("--changed-since", nargs="?", const="HEAD", default=None, metavar="REF",
+                        help="browser mode: only run steps affected by `git diff REF` (default HEAD) plus prerequisites")
+    parser.add_argument("--trace-on-failure", action="store_true",
+                        help="browser mode: buffer recent frames/DOM/network in memory, write a trace zip only when a step fails")
+    parser.add_argument("--coverage", nargs="?", const="e2e-coverage.json", default=None, metavar="PATH",
+                        help="browser mode: collect JS/CSS coverage per step and write an unused-bytes report")
     args = parser.parse_args(argv)
+    if args.changed_since and args.mode != "browser":
+        parser.error(f"--changed-since selects browser steps; it has no effect in --mode {args.mode}")
 
     ts = int(time.time())
     ctx = TestContext(
@@ -476,7 +1320,29 @@ def main(argv: List[str]) -> int:
         test_email=f"e2e_{ts}@example.com",
         test_password=f"E2e!{ts%100000:05d}",
     )
-    return run_suite(ctx)
+    if args.mode == "http":
+        return run_http_suite(ctx)
+    opts = SuiteOptions(coverage_out=args.coverage, iterations=args.iterations, artifacts_dir=args.artifacts,
+                        trace_on_failure=args.trace_on_failure)
+    if args.mode == "soak":
+        return run_soak(ctx, opts)
+    if args.changed_since:
+        changed = changed_files(args.changed_since)
+        opts.steps, reasons = select_steps(changed)
+        print_selection(changed, opts.steps, reasons)
+        if not opts.steps:
+            print("✅ No browser steps affected; nothing to run")
+            return 0
+    rc = 0
+    try:
+        for profile in args.profile or ["desktop"]:
+            print(f"\n📱 Profile: {profile}")
+            opts.profile = profile
+            rc = run_suite(ctx, opts) or rc
+    finally:
+        os.makedirs(opts.artifacts_dir, exist_ok=True)
+        print_timing_report(ctx, os.path.join(opts.artifacts_dir, "timing-report.json"))
+    return rc
 
 
 if __name__ == "__main__":